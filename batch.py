@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+# Solve many boards at once, without a display.
+#
+# Each board's predecessor is written next to it as NAME.solution.EXT, in
+# the board's own format, and one JSON line per board goes to stdout as
+# soon as it's done.
+
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from conx.automata import conway
+from conx.automata import formats
+from conx.common.guess import Guesses
+from conx.common.stats import Stats
+from conx.reverser import cnf
+from conx.reverser import heuristic
+from conx.reverser import oracle
+from conx.reverser import patterns
+from conx.reverser import strip
+from conx.reverser import yawnoc
+from conx.reverser.search import Search
+
+
+SUFFIX = '.solution'
+
+# Boards no wider than this on their narrow side are counted with Strip,
+# whose work grows with their length. Anything wider is counted by listing
+# every predecessor, which takes time exponential in the board's size, so
+# by default only boards of up to COUNT_LIMIT cells are.
+STRIP_WIDTH = 10
+COUNT_LIMIT = 256
+
+
+def boards(paths):
+    # Every board file named or inside a named directory, skipping
+    # solutions.
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for directory, _, filenames in sorted(os.walk(path)):
+            for filename in sorted(filenames):
+                root, extension = os.path.splitext(filename)
+                if (extension.lower() in formats.READERS and
+                        not root.endswith(SUFFIX)):
+                    yield os.path.join(directory, filename)
+
+
+def solution_path(path):
+    root, extension = os.path.splitext(path)
+    return root + SUFFIX + extension
+
+
+def count(reverser_class, automata, limit=COUNT_LIMIT):
+    # How many predecessors the board has, or None if it's too wide for
+    # Strip and has more than limit cells.
+    if min(automata.rows, automata.columns) <= STRIP_WIDTH:
+        return strip.Strip(automata).count()
+    if limit is not None and automata.rows * automata.columns > limit:
+        return None
+    reverser = reverser_class(automata)
+    if hasattr(reverser, 'count'):
+        return reverser.count()
+    return Search(reverser).count()
+
+
+def solve(reverser_class, with_stats, rule, counting, cache_path, path):
+    # Returns the report for one board. rule, if given, replaces the
+    # board's own. With counting, the most cells to count predecessors
+    # for (None for any), and the report says how many there are, or null
+    # if the board is too large. cache_path, if given, is a PatternCache to
+    # share.
+    report = {'board': path, 'guesses': 0, 'revisions': 0}
+    start = time.time()
+    try:
+        automata = conway.Conway.load(path)
+        if rule is not None:
+            automata.rule = rule
+        report['rule'] = str(automata.rule)
+        report['rows'], report['columns'] = automata.rows, automata.columns
+        loaded = time.time()
+        report['load_seconds'] = loaded - start
+        stats = Stats() if with_stats else None
+        reverser = reverser_class(automata, stats=stats)
+        if hasattr(reverser, 'solve'):
+            try:
+                for _ in reverser.solve(Guesses()):
+                    pass
+                solved = True
+            except ZeroDivisionError:
+                solved = False
+        else:
+            cache = None
+            if cache_path is not None:
+                cache = patterns.PatternCache(cache_path)
+            search = Search(reverser, cache=cache)
+            solved = search.solve()
+            report['guesses'] = search.guessed
+            if cache is not None:
+                report['cache_hits'] = cache.hits
+                cache.close()
+        report['revisions'] = reverser.revisions
+        report['solve_seconds'] = time.time() - loaded
+        if stats is not None:
+            report['stats'] = stats.as_dict()
+        if solved:
+            predecessor = conway.Conway(reverser.bestguess())
+            predecessor.rule = automata.rule
+            predecessor.save(solution_path(path))
+            report['solution'] = solution_path(path)
+            predecessor.step()
+            solved = predecessor.cells == automata.cells
+            report['status'] = 'solved' if solved else 'wrong'
+        else:
+            report['status'] = 'impossible'
+        if counting is not False:
+            report['predecessors'] = (count(reverser_class, automata, counting)
+                                      if solved else 0)
+    except Exception as e:
+        report['status'] = 'error'
+        report['error'] = '%s: %s' % (e.__class__.__name__, e)
+    report['seconds'] = time.time() - start
+    return report
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('paths', nargs='+')
+    ap.add_argument('--processes', type=int)
+    ap.add_argument('--sat', dest='sat', action='store_true')
+    ap.add_argument('--sat-command', type=str)
+    ap.add_argument('--strip', dest='strip', action='store_true')
+    ap.add_argument('--branching', choices=sorted(heuristic.HEURISTICS),
+                    default='ambiguous')
+    ap.add_argument('--stats', dest='stats', action='store_true')
+    ap.add_argument('--rule', type=str)
+    ap.add_argument('--count', dest='count', action='store_true',
+                    help='also count predecessors. Boards more than %i '
+                         'cells wide take time exponential in their size, '
+                         'and are only counted up to --count-limit cells'
+                         % STRIP_WIDTH)
+    ap.add_argument('--count-limit', type=int, default=COUNT_LIMIT,
+                    help='the most cells to count a wide board\'s '
+                         'predecessors for; 0 for no limit (default %i)'
+                         % COUNT_LIMIT)
+    ap.add_argument('--cache', type=str)
+    args = ap.parse_args()
+
+    reverser_class = functools.partial(yawnoc.Yawnoc, branching=args.branching)
+    if args.strip:
+        reverser_class = functools.partial(strip.Strip,
+                                           branching=args.branching)
+    if args.sat or args.sat_command:
+        solver = cnf.Solver
+        if args.sat_command:
+            solver = functools.partial(cnf.External, args.sat_command.split())
+        reverser_class = functools.partial(oracle.Oracle, solver=solver,
+                                           branching=args.branching)
+
+    counting = False
+    if args.count:
+        counting = args.count_limit or None
+    worker = functools.partial(solve, reverser_class, args.stats, args.rule,
+                               counting, args.cache)
+    paths = list(boards(args.paths))
+    pool = multiprocessing.Pool(args.processes)
+    try:
+        for report in pool.imap_unordered(worker, paths):
+            sys.stdout.write(json.dumps(report, sort_keys=True) + '\n')
+            sys.stdout.flush()
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+# Time the reverser on seeded random boards.
+#
+# Every board is made the way main.py makes one, from a fixed seed, so runs
+# can be compared. Each phase is timed on its own: building the Yawnoc, the
+# first corroborate() fixpoint, the search for a predecessor, and checking it
+# with Conway.step. Results are written as JSON, and --compare flags every
+# phase that got slower than in a saved run.
+
+import argparse
+import functools
+import json
+import random
+import sys
+import timeit
+
+import main
+from conx.automata import conway
+from conx.reverser import heuristic
+from conx.reverser import yawnoc
+from conx.reverser.search import Search
+
+
+PHASES = ('init', 'corroborate', 'autoguess', 'verify')
+
+clock = timeit.default_timer
+
+
+def board(size, density, seed):
+    random.seed(seed)
+    automata = conway.Conway(main.randomdata(size, density))
+    automata.step()
+    return automata
+
+
+def run_case(reverser_class, size, density, seed):
+    automata = board(size, density, seed)
+    case = {'size': size, 'density': density, 'seed': seed}
+
+    start = clock()
+    reverser = reverser_class(automata)
+    case['init'] = clock() - start
+
+    start = clock()
+    try:
+        for _ in reverser.corroborate():
+            pass
+    except ZeroDivisionError:
+        pass
+    case['corroborate'] = clock() - start
+
+    search = Search(reverser)
+    start = clock()
+    solved = search.solve()
+    case['autoguess'] = clock() - start
+    case['guesses'] = search.guessed
+    case['revisions'] = reverser.revisions
+
+    start = clock()
+    predecessor = conway.Conway(reverser.bestguess())
+    predecessor.step()
+    verified = predecessor.cells == automata.cells
+    case['verify'] = clock() - start
+
+    if not solved:
+        case['status'] = 'impossible'
+    else:
+        case['status'] = 'solved' if verified else 'wrong'
+    return case
+
+
+def run(reverser_class, sizes, densities, seeds, repeat):
+    # Each case keeps the fastest of its repeats, phase by phase.
+    cases = []
+    for size in sizes:
+        for density in densities:
+            for seed in range(seeds):
+                runs = [run_case(reverser_class, size, density, seed)
+                        for _ in range(repeat)]
+                case = runs[0]
+                for phase in PHASES:
+                    case[phase] = min(r[phase] for r in runs)
+                cases.append(case)
+                sys.stderr.write('%(size)ix%(size)i at %(density)s, seed '
+                                 '%(seed)i: %(status)s\n' % case)
+    return cases
+
+
+def key(case):
+    return case['size'], case['density'], case['seed']
+
+
+def compare(baseline, cases, tolerance, floor):
+    # Every (case, phase, before, after) that got slower by more than
+    # tolerance, ignoring phases that take less than floor seconds.
+    before = dict((key(case), case) for case in baseline)
+    regressions = []
+    for case in cases:
+        old = before.get(key(case))
+        if old is None:
+            continue
+        for phase in PHASES:
+            if case[phase] < floor:
+                continue
+            if case[phase] > old[phase] * (1 + tolerance):
+                regressions.append((key(case), phase, old[phase], case[phase]))
+    return regressions
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[8, 12, 16])
+    ap.add_argument('--densities', type=float, nargs='+',
+                    default=[0.2, 0.333, 0.5])
+    ap.add_argument('--seeds', type=int, default=3)
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--branching', choices=sorted(heuristic.HEURISTICS),
+                    default='ambiguous')
+    ap.add_argument('--output', type=str, default='bench.json')
+    ap.add_argument('--compare', type=str,
+                    help='a saved run to check this one against')
+    ap.add_argument('--tolerance', type=float, default=0.2)
+    ap.add_argument('--floor', type=float, default=0.001)
+    args = ap.parse_args()
+
+    reverser_class = functools.partial(yawnoc.Yawnoc, branching=args.branching)
+    cases = run(reverser_class, args.sizes, args.densities, args.seeds,
+                args.repeat)
+    with open(args.output, 'w') as outf:
+        json.dump({'branching': args.branching, 'cases': cases}, outf,
+                  indent=1, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare, 'r') as inf:
+            baseline = json.load(inf)['cases']
+        regressions = compare(baseline, cases, args.tolerance, args.floor)
+        for (size, density, seed), phase, old, new in regressions:
+            print "SLOWER: %ix%i at %s, seed %i, %s: %.4fs -> %.4fs" % (
+                size, size, density, seed, phase, old, new)
+        if regressions:
+            sys.exit(1)
+        print "No regressions."
@@ -1,14 +1,32 @@
 #!/usr/bin/env python
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import formats
+import rules
+
 DEAD = 0
 ALIVE = 1
 
 class Conway(object):
     cells = None
 
-    def __init__(self, cells):
+    def __init__(self, cells, rule=rules.LIFE):
         self.cells = cells[:]
-        self.rule = [(0, 3), (1, 2), (1, 3)]
+        self.rule = rule
+
+    @property
+    def rule(self):
+        return self._rule
+
+    @rule.setter
+    def rule(self, rule):
+        # A rules.Rule, a rule string like B36/S23, or (center, live
+        # neighbors) pairs.
+        self._rule = rules.compile(rule)
 
     def __str__(self):
         lookup = {
@@ -26,20 +44,17 @@ class Conway(object):
 
     @classmethod
     def load(cls, filename):
-        text = ''
-        cells = []
-        with open(filename, 'r') as inf:
-            text = inf.read()
-        rows = text.split('\n')
-        rows = [row for row in rows if not row.startswith('#')]
-        rows = [row for row in rows if row]
-        rows = [[row[i:i+2] for i in range(0, len(row), 2)] for row in rows]
-        lookup = {
-            '  ': DEAD,
-            '[]': ALIVE,
-        }
-        cells = [[lookup[cell] for cell in row] for row in rows]
-        return cls(cells)
+        # Any format in formats.READERS, by extension.
+        cells, rule = formats.read(filename, array=cls is ArrayConway)
+        automata = cls(cells)
+        if rule is not None:
+            automata.rule = rule
+        return automata
+
+    def save(self, filename):
+        # Any format in formats.WRITERS, by extension. The rule is only
+        # written where the format has room for it.
+        formats.write(filename, self.cells, self.rule)
 
     @property
     def rows(self):
@@ -61,15 +76,16 @@ class Conway(object):
             # Any cell outside the board is DEAD.
             return DEAD
 
-    def _rule(self, neighborhood):
+    def _next(self, neighborhood, table):
         center = neighborhood[4]
-        neighbors = sum(neighborhood) - center
-        return ALIVE if (center, neighbors) in self.rule else DEAD
+        return table[9 * center + sum(neighborhood) - center]
 
-    def step(self):
-        self.cells = [[self._rule(self.neighborhood(row, column))
-                       for column in range(self.columns)]
-                      for row in range(self.rows)]
+    def step(self, generations=1):
+        table = self.rule.table
+        for _ in range(generations):
+            self.cells = [[self._next(self.neighborhood(row, column), table)
+                           for column in range(self.columns)]
+                          for row in range(self.rows)]
 
     def neighborhood_coords(self, row, column):
         return [(row + r, column + c)
@@ -87,6 +103,72 @@ class Conway(object):
         return float(correct) / size
 
 
+class ArrayConway(Conway):
+    # The same automaton, stored as a uint8 numpy array and stepped a whole
+    # board at a time. Needs numpy.
+
+    def __init__(self, cells, rule=rules.LIFE):
+        if numpy is None:
+            raise ImportError('ArrayConway needs numpy')
+        super(ArrayConway, self).__init__(cells, rule)
+
+    @property
+    def cells(self):
+        return self.board.tolist()
+
+    @cells.setter
+    def cells(self, cells):
+        self.board = numpy.array(cells, dtype=numpy.uint8, ndmin=2)
+        if not self.board.size:
+            self.board = numpy.zeros((0, 0), dtype=numpy.uint8)
+
+    @property
+    def rows(self):
+        return self.board.shape[0]
+
+    @property
+    def columns(self):
+        return self.board.shape[1]
+
+    def cell_at(self, row, column):
+        if 0 <= row < self.rows and 0 <= column < self.columns:
+            return int(self.board[row, column])
+        return DEAD
+
+    def neighbors(self):
+        # How many live neighbors each cell has. Off the board is DEAD.
+        padded = numpy.pad(self.board, 1, 'constant')
+        R, C = self.rows, self.columns
+        total = numpy.zeros((R, C), dtype=numpy.uint8)
+        for dr in (0, 1, 2):
+            for dc in (0, 1, 2):
+                if dr != 1 or dc != 1:
+                    total += padded[dr:dr + R, dc:dc + C]
+        return total
+
+    def step(self, generations=1):
+        table = numpy.array(self.rule.table, dtype=numpy.uint8)
+        for _ in range(generations):
+            self.board = table[9 * self.board + self.neighbors()]
+
+    def save(self, filename):
+        formats.write(filename, self.board, self.rule)
+
+    def _board_like(self, other):
+        # Another automaton's cells, cropped or padded with DEAD to match.
+        board = getattr(other, 'board', None)
+        if board is None:
+            board = numpy.array(other.cells, dtype=numpy.uint8, ndmin=2)
+        matched = numpy.zeros(self.board.shape, dtype=numpy.uint8)
+        R = min(self.rows, board.shape[0])
+        C = min(self.columns, board.shape[1]) if board.size else 0
+        matched[:R, :C] = board[:R, :C]
+        return matched
+
+    def diff(self, other):
+        return float(numpy.mean(self.board == self._board_like(other)))
+
+
 if __name__ == '__main__':
     import random
     coin = lambda p: p >= random.random()
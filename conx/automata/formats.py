@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+
+# Reading and writing boards.
+#
+# Three formats, picked by the file's extension:
+#   .gol   two characters per cell, '[]' for ALIVE and '  ' for DEAD.
+#   .rle   the run-length encoding most Life software uses.
+#   .golb  a short header, then each row packed eight cells to a byte. It
+#          can be memory-mapped, so very large boards load without being
+#          read through Python a cell at a time.
+# Readers return (cells, rule), where rule is None if the file doesn't say.
+# Rows come back padded with DEAD to the width of the widest.
+
+import itertools
+import mmap
+import re
+import struct
+
+import rules
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DEAD = 0
+ALIVE = 1
+
+MAGIC = 'CONXGOL1'
+HEADER = struct.Struct('<8sII')
+
+
+def _pad(rows, columns=None):
+    if columns is None:
+        columns = max([len(row) for row in rows] or [0])
+    for row in rows:
+        row.extend([DEAD] * (columns - len(row)))
+    return rows
+
+
+def _lists(cells):
+    # Rows of plain ints, from lists or a numpy array.
+    if hasattr(cells, 'tolist'):
+        return cells.tolist()
+    return cells
+
+
+# .gol
+
+GOL_CELLS = {'[': ALIVE, ' ': DEAD}
+
+
+def read_gol(filename):
+    # Only the first character of each pair counts, so a row cut off in the
+    # middle of its last cell still reads.
+    rows = []
+    with open(filename, 'r') as inf:
+        for number, line in enumerate(inf, 1):
+            line = line.rstrip('\r\n')
+            if not line or line.startswith('#'):
+                continue
+            try:
+                rows.append([GOL_CELLS[ch] for ch in line[0::2]])
+            except KeyError as e:
+                raise ValueError('%s, line %i: unknown cell %r' %
+                                 (filename, number, e.args[0]))
+    return _pad(rows), None
+
+
+def write_gol(filename, cells, rule=None):
+    faces = ('  ', '[]')
+    with open(filename, 'w') as outf:
+        for row in _lists(cells):
+            outf.write(''.join([faces[cell] for cell in row]))
+            outf.write('\n')
+
+
+# .rle
+
+RLE_TOKEN = re.compile(r'(\d*)([a-zA-Z$!])')
+
+
+def read_rle(filename):
+    columns = rows_wanted = None
+    rule = None
+    rows = [[]]
+    with open(filename, 'r') as inf:
+        for line in inf:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('x'):
+                header = dict((key.strip(), value.strip()) for key, value in
+                              (part.split('=', 1) for part in line.split(',')))
+                columns = int(header['x'])
+                rows_wanted = int(header['y'])
+                if 'rule' in header:
+                    rule = rules.compile(header['rule'])
+                continue
+            for count, tag in RLE_TOKEN.findall(line):
+                count = int(count) if count else 1
+                if tag == '!':
+                    break
+                if tag == '$':
+                    rows.extend([] for _ in range(count))
+                elif tag == 'b':
+                    rows[-1].extend([DEAD] * count)
+                else:
+                    rows[-1].extend([ALIVE] * count)
+            else:
+                continue
+            break
+    if rows_wanted is not None:
+        rows.extend([] for _ in range(rows_wanted - len(rows)))
+        rows = rows[:rows_wanted]
+    return _pad(rows, columns), rule
+
+
+def _runs(row):
+    # (count, state) for each run in a row, leaving off trailing DEAD.
+    runs = [(len(list(run)), cell) for cell, run in itertools.groupby(row)]
+    if runs and runs[-1][1] == DEAD:
+        runs.pop()
+    return runs
+
+
+def write_rle(filename, cells, rule=None):
+    cells = _lists(cells)
+    header = 'x = %i, y = %i' % (len(cells[0]) if cells else 0, len(cells))
+    if rule is not None:
+        header += ', rule = %s' % rules.compile(rule)
+    tokens = []
+    ends = 0
+    for row in cells:
+        runs = _runs(row)
+        if runs and ends:
+            tokens.append('%s$' % (ends if ends > 1 else ''))
+            ends = 0
+        for count, state in runs:
+            tokens.append('%s%s' % (count if count > 1 else '', 'bo'[state]))
+        ends += 1
+    tokens.append('!')
+    lines = ['']
+    for token in tokens:
+        if len(lines[-1]) + len(token) > 70:
+            lines.append('')
+        lines[-1] += token
+    with open(filename, 'w') as outf:
+        outf.write(header + '\n')
+        outf.write('\n'.join(lines) + '\n')
+
+
+# .golb
+
+def read_packed(filename, array=False):
+    # With array, and numpy, the cells come back as a uint8 array unpacked
+    # straight from a memory map.
+    with open(filename, 'rb') as inf:
+        magic, rows, columns = HEADER.unpack(inf.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError('%s is not a packed board' % filename)
+        width = (columns + 7) // 8
+        if not rows or not width:
+            return [[] for _ in range(rows)], None
+        if numpy is not None:
+            packed = numpy.memmap(inf, dtype=numpy.uint8, mode='r',
+                                  offset=HEADER.size, shape=(rows, width))
+            cells = numpy.unpackbits(packed, axis=1)[:, :columns]
+            return (cells if array else cells.tolist()), None
+        packed = mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            cells = []
+            for row in range(rows):
+                start = HEADER.size + row * width
+                line = bytearray(packed[start:start + width])
+                cells.append([line[column >> 3] >> (7 - (column & 7)) & 1
+                              for column in range(columns)])
+        finally:
+            packed.close()
+    return cells, None
+
+
+def write_packed(filename, cells, rule=None):
+    if numpy is not None:
+        board = numpy.array(cells, dtype=numpy.uint8, ndmin=2)
+        rows, columns = board.shape if board.size else (len(cells), 0)
+        body = numpy.packbits(board, axis=1).tobytes() if board.size else ''
+    else:
+        rows = len(cells)
+        columns = len(cells[0]) if rows else 0
+        packed = bytearray()
+        for row in cells:
+            line = bytearray((columns + 7) // 8)
+            for column, cell in enumerate(row):
+                if cell:
+                    line[column >> 3] |= 0x80 >> (column & 7)
+            packed.extend(line)
+        body = bytes(packed)
+    with open(filename, 'wb') as outf:
+        outf.write(HEADER.pack(MAGIC, rows, columns))
+        outf.write(body)
+
+
+READERS = {'.gol': read_gol, '.rle': read_rle, '.golb': read_packed}
+WRITERS = {'.gol': write_gol, '.rle': write_rle, '.golb': write_packed}
+
+
+def _extension(filename, table):
+    for extension in table:
+        if filename.lower().endswith(extension):
+            return extension
+    return '.gol'
+
+
+def read(filename, array=False):
+    # (cells, rule) from any format. Anything unrecognized is read as .gol.
+    reader = READERS[_extension(filename, READERS)]
+    if reader is read_packed:
+        return reader(filename, array)
+    return reader(filename)
+
+
+def write(filename, cells, rule=None):
+    WRITERS[_extension(filename, WRITERS)](filename, cells, rule)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+
+# Long-range simulation of Life-like automata.
+#
+# Conway steps a dense, bounded board one generation at a time. These step
+# live cells on an unbounded plane instead, which is what matters when
+# checking how a pattern behaves far into the future:
+#
+#   Hashlife stores the plane as a quadtree of hash-consed nodes, and
+#   remembers what every node turns into. Repeated structure in space and
+#   time is then only ever computed once, so it can jump 2**j generations
+#   at a time.
+#
+#   SparseLife keeps just the set of live cells, which is cheap for very
+#   sparse boards. It can also clip to the board's bounds, like Conway.
+#
+# Both load .gol files, convert to and from Conway, and can find cycles by
+# hashing their states.
+
+import conway
+import rules
+
+
+class Universe(object):
+    # What the engines have in common. Subclasses provide step(), live_cells()
+    # and state(), a hashable snapshot of the pattern.
+
+    def __init__(self, live=(), rule=None, rows=None, columns=None):
+        self.rule = rules.compile(rule if rule is not None else rules.LIFE)
+        # The window to_conway() shows by default.
+        self.rows = rows
+        self.columns = columns
+        self.generation = 0
+
+    @classmethod
+    def from_conway(cls, automata, **kwargs):
+        live = [(row, column)
+                for row, cells in enumerate(automata.cells)
+                for column, cell in enumerate(cells)
+                if cell]
+        return cls(live, rule=automata.rule, rows=automata.rows,
+                   columns=automata.columns, **kwargs)
+
+    @classmethod
+    def load(cls, filename, **kwargs):
+        return cls.from_conway(conway.Conway.load(filename), **kwargs)
+
+    def to_conway(self, rows=None, columns=None, row=0, column=0,
+                  cls=conway.Conway):
+        # The cells in a window of the plane, as a Conway board.
+        rows = self.rows if rows is None else rows
+        columns = self.columns if columns is None else columns
+        cells = [[conway.DEAD] * columns for _ in range(rows)]
+        for r, c in self.live_cells():
+            if row <= r < row + rows and column <= c < column + columns:
+                cells[r - row][c - column] = conway.ALIVE
+        automata = cls(cells)
+        automata.rule = self.rule
+        return automata
+
+    @property
+    def population(self):
+        return len(self.live_cells())
+
+    def find_cycle(self, limit):
+        # Step until the pattern repeats a state it has been in before.
+        # Returns (generation it first appeared, period), or None if that
+        # doesn't happen within limit generations.
+        seen = {self.state(): self.generation}
+        for _ in range(limit):
+            self.step()
+            state = self.state()
+            if state in seen:
+                return seen[state], self.generation - seen[state]
+            seen[state] = self.generation
+        return None
+
+
+class SparseLife(Universe):
+
+    def __init__(self, live=(), rule=None, rows=None, columns=None,
+                 bounded=False):
+        # With bounded, everything outside rows x columns stays DEAD.
+        super(SparseLife, self).__init__(live, rule, rows, columns)
+        self.bounded = bounded
+        self.live = set(live)
+
+    def _inside(self, row, column):
+        return (0 <= row < self.rows and 0 <= column < self.columns)
+
+    def step(self, generations=1):
+        rule = set(self.rule)
+        for _ in range(generations):
+            counts = dict.fromkeys(self.live, 0)
+            for (row, column) in self.live:
+                for dr in (-1, 0, 1):
+                    for dc in (-1, 0, 1):
+                        if dr or dc:
+                            rc = (row + dr, column + dc)
+                            counts[rc] = counts.get(rc, 0) + 1
+            live = set(rc for rc, count in counts.items()
+                       if (int(rc in self.live), count) in rule)
+            if self.bounded:
+                live = set(rc for rc in live if self._inside(*rc))
+            self.live = live
+            self.generation += 1
+
+    def live_cells(self):
+        return sorted(self.live)
+
+    @property
+    def population(self):
+        return len(self.live)
+
+    def state(self):
+        return frozenset(self.live)
+
+
+class Node(object):
+    # A 2**level square of cells. Level 0 nodes are single cells; every
+    # other node is made of four quadrants one level down. Nodes are never
+    # changed once made, and Hashlife makes only one of each.
+    __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population')
+
+    def __init__(self, level, nw=None, ne=None, sw=None, se=None, population=0):
+        self.level = level
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.population = population
+
+
+class Hashlife(Universe):
+
+    def __init__(self, live=(), rule=None, rows=None, columns=None):
+        super(Hashlife, self).__init__(live, rule, rows, columns)
+        self._rule = set(self.rule)
+        self._nodes = {}
+        self._empties = [Node(0)]
+        self._results = {}
+        self.on = Node(0, population=1)
+        live = list(live)
+        # The top left corner of the root node, on the plane.
+        self.row = min([r for r, c in live] or [0])
+        self.column = min([c for r, c in live] or [0])
+        level = 3
+        span = max([max(r - self.row, c - self.column) + 1
+                    for r, c in live] or [1])
+        while (1 << level) < span:
+            level += 1
+        self.root = self._build(live, self.row, self.column, level)
+
+    def join(self, nw, ne, sw, se):
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(nw.level + 1, nw, ne, sw, se,
+                        nw.population + ne.population +
+                        sw.population + se.population)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level):
+        while len(self._empties) <= level:
+            e = self._empties[-1]
+            self._empties.append(self.join(e, e, e, e))
+        return self._empties[level]
+
+    def _build(self, live, row, column, level):
+        if not live:
+            return self.empty(level)
+        if level == 0:
+            return self.on
+        half = 1 << (level - 1)
+        quadrants = [[], [], [], []]
+        for r, c in live:
+            quadrants[2 * (r >= row + half) + (c >= column + half)].append((r, c))
+        nw, ne, sw, se = quadrants
+        return self.join(self._build(nw, row, column, level - 1),
+                         self._build(ne, row, column + half, level - 1),
+                         self._build(sw, row + half, column, level - 1),
+                         self._build(se, row + half, column + half, level - 1))
+
+    def _collect(self, node, row, column, out):
+        if not node.population:
+            return
+        if node.level == 0:
+            out.append((row, column))
+            return
+        half = 1 << (node.level - 1)
+        self._collect(node.nw, row, column, out)
+        self._collect(node.ne, row, column + half, out)
+        self._collect(node.sw, row + half, column, out)
+        self._collect(node.se, row + half, column + half, out)
+
+    def live_cells(self):
+        out = []
+        self._collect(self.root, self.row, self.column, out)
+        return sorted(out)
+
+    @property
+    def population(self):
+        return self.root.population
+
+    def center(self, node):
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def _base(self, node):
+        # Step a 4x4 node once, giving its middle 2x2.
+        cells = [[0] * 4 for _ in range(4)]
+        for r0, c0, quadrant in ((0, 0, node.nw), (0, 2, node.ne),
+                                 (2, 0, node.sw), (2, 2, node.se)):
+            cells[r0][c0] = quadrant.nw.population
+            cells[r0][c0 + 1] = quadrant.ne.population
+            cells[r0 + 1][c0] = quadrant.sw.population
+            cells[r0 + 1][c0 + 1] = quadrant.se.population
+        out = []
+        for row in (1, 2):
+            for column in (1, 2):
+                neighbors = sum(cells[row + dr][column + dc]
+                                for dr in (-1, 0, 1)
+                                for dc in (-1, 0, 1)
+                                if dr or dc)
+                alive = (cells[row][column], neighbors) in self._rule
+                out.append(self.on if alive else self.empty(0))
+        return self.join(*out)
+
+    def advance(self, node, j):
+        # The middle half of a node, 2**j generations on. j <= level - 2.
+        k = node.level
+        if not node.population:
+            return self.empty(k - 1)
+        key = (node, j)
+        if key in self._results:
+            return self._results[key]
+        if k == 2:
+            result = self._base(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            subs = [nw, self.join(nw.ne, ne.nw, nw.se, ne.sw), ne,
+                    self.join(nw.sw, nw.se, sw.nw, sw.ne), self.center(node),
+                    self.join(ne.sw, ne.se, se.nw, se.ne),
+                    sw, self.join(sw.ne, se.nw, sw.se, se.sw), se]
+            if j == k - 2:
+                # Half the time now, and half in the second pass.
+                m = [self.advance(s, j - 1) for s in subs]
+                later = j - 1
+            else:
+                m = [self.center(s) for s in subs]
+                later = j
+            result = self.join(
+                self.advance(self.join(m[0], m[1], m[3], m[4]), later),
+                self.advance(self.join(m[1], m[2], m[4], m[5]), later),
+                self.advance(self.join(m[3], m[4], m[6], m[7]), later),
+                self.advance(self.join(m[4], m[5], m[7], m[8]), later))
+        self._results[key] = result
+        return result
+
+    def _expand(self):
+        # Surround the root with empty space, one level up.
+        root = self.root
+        e = self.empty(root.level - 1)
+        self.root = self.join(self.join(e, e, e, root.nw),
+                              self.join(e, e, root.ne, e),
+                              self.join(e, root.sw, e, e),
+                              self.join(root.se, e, e, e))
+        shift = 1 << (root.level - 1)
+        self.row -= shift
+        self.column -= shift
+
+    def _centered(self):
+        # Whether all the live cells are in the middle half of the root.
+        root = self.root
+        return root.population == (root.nw.se.population +
+                                   root.ne.sw.population +
+                                   root.sw.ne.population +
+                                   root.se.nw.population)
+
+    def step(self, generations=1):
+        j = 0
+        while generations:
+            if generations & 1:
+                while self.root.level < j + 2 or not self._centered():
+                    self._expand()
+                # Nothing can travel further than the empty border is wide.
+                self._expand()
+                shift = 1 << (self.root.level - 2)
+                self.root = self.advance(self.root, j)
+                self.row += shift
+                self.column += shift
+                self.generation += 1 << j
+            generations >>= 1
+            j += 1
+
+    def _shrink(self):
+        # Drop empty space around the root, down to level 3.
+        while self.root.level > 3 and self._centered():
+            shift = 1 << (self.root.level - 2)
+            self.root = self.center(self.root)
+            self.row += shift
+            self.column += shift
+
+    def state(self):
+        self._shrink()
+        if not self.root.population:
+            return None
+        return (self.root, self.row, self.column)
+
+    def clear(self):
+        # Forget every remembered result, to free memory.
+        self._results = {}
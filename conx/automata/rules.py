@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+# Life-like rules, compiled once into lookup tables.
+#
+# A rule says how many live neighbors bring a dead cell to life, and how
+# many keep a live one alive, written like B3/S23 for Conway's own. Each is
+# compiled once per process, and the tables are shared by everything that
+# steps or reverses a board under it.
+#
+# A history is a cell's 3x3 neighborhood as a nine-bit integer, NW in the
+# high bit, the center in bit 4 and SE in the low bit.
+
+import re
+
+DEAD = 0
+ALIVE = 1
+
+CENTER = 1 << 4
+
+
+class Rule(object):
+
+    def __init__(self, born, survive):
+        self.born = tuple(sorted(set(born)))
+        self.survive = tuple(sorted(set(survive)))
+        # What each history becomes.
+        self.outcomes = []
+        # The histories that become DEAD, and ALIVE, as 512-bit sets.
+        self.masks = [0, 0]
+        for history in range(512):
+            center = ALIVE if history & CENTER else DEAD
+            neighbors = bin(history).count('1') - center
+            outcome = ALIVE if (center, neighbors) in self else DEAD
+            self.outcomes.append(outcome)
+            self.masks[outcome] |= 1 << history
+        # What a cell becomes, indexed by 9 * center + live neighbors.
+        self.table = [ALIVE if (center, neighbors) in self else DEAD
+                      for center in (DEAD, ALIVE)
+                      for neighbors in range(9)]
+
+    def __contains__(self, pair):
+        # Whether (center, live neighbors) makes a live cell.
+        center, neighbors = pair
+        return neighbors in (self.survive if center else self.born)
+
+    def __iter__(self):
+        # Every (center, live neighbors) that makes a live cell.
+        for neighbors in self.born:
+            yield (DEAD, neighbors)
+        for neighbors in self.survive:
+            yield (ALIVE, neighbors)
+
+    def __eq__(self, other):
+        try:
+            other = compile(other)
+        except (TypeError, ValueError):
+            return False
+        return (self.born, self.survive) == (other.born, other.survive)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.born, self.survive))
+
+    def __str__(self):
+        return 'B%s/S%s' % (''.join(map(str, self.born)),
+                            ''.join(map(str, self.survive)))
+
+    def __repr__(self):
+        return '<Rule %s>' % self
+
+
+_COMPILED = {}
+
+
+def parse(text):
+    # (born, survive) from B3/S23, or the older 23/3 with survivals first.
+    text = text.strip().upper()
+    match = re.match(r'^B([0-8]*)/S([0-8]*)$', text)
+    if match:
+        born, survive = match.groups()
+    else:
+        match = re.match(r'^([0-8]*)/([0-8]*)$', text)
+        if not match:
+            raise ValueError('Unknown rule %r' % text)
+        survive, born = match.groups()
+    return [int(n) for n in born], [int(n) for n in survive]
+
+
+def compile(rule):
+    # A Rule from a Rule, a rule string, or (center, live neighbors) pairs.
+    if isinstance(rule, Rule):
+        return rule
+    if isinstance(rule, basestring):
+        born, survive = parse(rule)
+    else:
+        pairs = list(rule)
+        born = [n for c, n in pairs if c == DEAD]
+        survive = [n for c, n in pairs if c == ALIVE]
+    key = (tuple(sorted(set(born))), tuple(sorted(set(survive))))
+    if key not in _COMPILED:
+        _COMPILED[key] = Rule(*key)
+    return _COMPILED[key]
+
+
+LIFE = compile('B3/S23')
+HIGHLIFE = compile('B36/S23')
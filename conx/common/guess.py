@@ -12,6 +12,18 @@ class Guesses(object):
                 D[k] = v
         return D
 
+    def decisions(self):
+        # The guesses still in effect, in the order they were made.
+        D = self.as_dict()
+        seen = set()
+        decisions = []
+        for (k, v) in reversed(self._items):
+            if k in D and k not in seen:
+                seen.add(k)
+                decisions.append((k, v))
+        decisions.reverse()
+        return decisions
+
     def __str__(self):
         return ', '.join(["(%i, %i): %i" % (r, c, v) for ((r, c), v) in self._items])
 
@@ -28,6 +40,13 @@ class Guesses(object):
         D = self.as_dict()
         return D.get(key, default)
 
+    def copy(self):
+        # The guesses still in effect, as new Guesses.
+        guesses = Guesses()
+        for (k, v) in self.decisions():
+            guesses.append(k, v)
+        return guesses
+
     def append(self, k, v):
         self._items.append((k, v))
 
@@ -0,0 +1,31 @@
+class Nogoods(object):
+    # Combinations of guesses known to lead to a contradiction.
+    # A guess is ((row, column), state), just like in Guesses.
+    def __init__(self):
+        self._items = set()
+        self._by_guess = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, guesses):
+        nogood = frozenset(guesses)
+        if not nogood or nogood in self._items:
+            return
+        self._items.add(nogood)
+        for guess in nogood:
+            self._by_guess.setdefault(guess, []).append(nogood)
+
+    def blocking(self, decisions, guess):
+        # A nogood that making this guess on top of the decisions would
+        # complete, or None.
+        current = set(decisions)
+        current.add(guess)
+        for nogood in self._by_guess.get(guess, []):
+            if nogood <= current:
+                return nogood
+        return None
+
+    def reset(self):
+        self._items = set()
+        self._by_guess = {}
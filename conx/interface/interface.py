@@ -1,45 +1,57 @@
 #!/usr/bin/env python
 
-from __future__ import print_function
-
+import contextlib
+import os
+import Queue
+import select
 import sys
 import termios
+import threading
 import tty
 from conx.common.guess import Guesses
+from conx.common.nogood import Nogoods
+from conx.interface.screen import NORMAL, Screen
+from conx.reverser.portfolio import Portfolio
+from conx.reverser.search import Search
 
 
-# Utility display and input functions.
-def getch():
+# Utility input functions.
+def getch(timeout=None):
+    # The next key, or None if none comes within timeout seconds. The
+    # terminal should already be raw; see Interface.run.
     fd = sys.stdin.fileno()
-    old_settings = termios.tcgetattr(fd)
-    try:
-        tty.setraw(sys.stdin.fileno())
-        ch = sys.stdin.read(1)
-    finally:
-        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-    return ch
-
+    ready, _, _ = select.select([fd], [], [], timeout)
+    if not ready:
+        return None
+    return os.read(fd, 1)
 
-def emit(s):
-    print(s, end='')
-    sys.stdout.flush()
 
+IMPOSSIBLE = '\x1b[48;5;196mImpossible!\x1b[0m'
+AUTOGUESSING = '\x1b[48;5;21mAutoguessing... (x to pause)\x1b[0m'
+PAUSED = '\x1b[48;5;21mPaused. ! to carry on; a, d or u to stop.\x1b[0m'
+BUSY = '\x1b[48;5;21mStill autoguessing; x to pause first.\x1b[0m'
 
-def erase_screen():
-    emit('%s[2J' % chr(27))
+# How long to wait, in seconds, for a background autoguess to stop at a
+# checkpoint, or to finish once it has been told to stop.
+HOLD_WAIT = 0.5
 
 
-def move_cursor(row=None, column=None):
-    ROW = 1 if row is None else row
-    COLUMN = 1 if column is None else column
-    SEMICOLON = ';' if ROW + COLUMN else ''
-    emit('%s[%i%s%iH' % (chr(27), ROW, SEMICOLON, COLUMN))
+class Cancelled(Exception):
+    # Raised inside a background autoguess to stop it.
+    pass
 
 
 class Interface(object):
 
-    def __init__(self, automata, reverser_class):
+    def __init__(self, automata, reverser_class, portfolio=None, fps=30,
+                 cache=None):
+        # portfolio, if given, is how many processes autoguess races
+        # searches across. fps limits how often the screen is redrawn while
+        # the board is changing. cache, if given, is a PatternCache for
+        # autoguess to look solved groups of cells up in.
         self.automata = automata
+        self.portfolio = portfolio
+        self.cache = cache
         self.reverser_class = reverser_class
         self.rows = self.automata.rows
         self.columns = self.automata.columns
@@ -51,91 +63,223 @@ class Interface(object):
         self.show_numbers = False
         self.show_50s = False
         self.guesses = Guesses()
+        self.nogoods = Nogoods()
+        self.screen = Screen(fps)
+        self.screen.park = (self.rows + 3, 2)
+        # A background autoguess: the thread running it, the changes it
+        # has made for run() to draw, what lets it carry on (cleared to
+        # pause it), whether it has stopped at a checkpoint since, and what
+        # stops it for good.
+        self._worker = None
+        self._events = Queue.Queue()
+        self._running = threading.Event()
+        self._parked = threading.Event()
+        self._cancel = threading.Event()
 
     def guess(self):
         self.status_line = '\x1b[48;5;21mThinking...\x1b[0m'
         self._draw_status_line()
-        if self.reverser.impossible:
-            self.reverser.reset()
-            self._draw_reverser()
-
-        for (row, column), state in self.guesses.as_dict().items():
-            self.reverser.narrow(row, column, c=state)
-
         try:
-            for ((r, c), chance, length) in self.reverser.corroborate():
+            for ((r, c), chance, length) in self.reverser.evaluate_guesses(self.guesses):
                 self._draw_one_guess((r, c), chance, length)
-                self.status_line = '\x1b[48;5;21mThinking...\x1b[0m'
-                self._draw_status_line()
         except ZeroDivisionError:
-            self.status_line = '\x1b[48;5;196mImpossible!\x1b[0m'
+            self.status_line = IMPOSSIBLE
             self._draw_status_line()
         else:
             self.status_line = ''
             self._draw_status_line()
 
-    def _eval_and_draw(self):
+    def autoguess(self):
+        self.status_line = '\x1b[48;5;21mAutoguessing...\x1b[0m'
+        self._draw_status_line()
+        self.status_line = self._autoguess(self._draw_one_guess)
+        self._draw_status_line()
+
+    def _autoguess(self, report, checkpoint=None):
+        # Returns the status line to show after, but leaves the screen to
+        # the caller, as this may be running in the background. checkpoint
+        # is as for Search.
+        stats = getattr(self.reverser, 'stats', None)
+        if stats is None:
+            return self._autochoose(report, checkpoint)
+        with stats.phase('autoguess'):
+            return self._autochoose(report, checkpoint)
+
+    def _autochoose(self, report, checkpoint):
+        if hasattr(self.reverser, 'solve'):
+            # This reverser can finish the board on its own.
+            return self._autosolve(report, checkpoint)
+        if self.portfolio:
+            return self._autoportfolio(report, checkpoint)
+        search = Search(self.reverser, self.guesses, self.nogoods,
+                        report=report, cache=self.cache,
+                        checkpoint=checkpoint)
+        if search.solve():
+            return ''
+        return IMPOSSIBLE
+
+    def _autoportfolio(self, report, checkpoint):
+        # Race searches from where the guesses leave off, then guess every
+        # cell still undecided the way the winner found it.
         try:
             for ((r, c), chance, length) in self.reverser.evaluate_guesses(self.guesses):
-                self._draw_one_guess((r, c), chance, length)
+                report((r, c), chance, length)
+        except ZeroDivisionError:
+            cells = None
+        else:
+            portfolio = Portfolio(self.automata, self.reverser, self.portfolio)
+            cells = portfolio.solve(checkpoint)
+        if cells is None:
+            return IMPOSSIBLE
+        for r, row in enumerate(self.reverser.cloud):
+            for c, (chance, length) in enumerate(row):
+                if 0.0 < chance < 1.0:
+                    self.guesses.append((r, c), cells[r][c])
+        try:
+            for ((r, c), chance, length) in self.reverser.evaluate_guesses(self.guesses):
+                report((r, c), chance, length)
+        except ZeroDivisionError:
+            return IMPOSSIBLE
+        return ''
+
+    def _autosolve(self, report, checkpoint):
+        if checkpoint is None:
+            solving = self.reverser.solve(self.guesses)
+        else:
+            solving = self.reverser.solve(self.guesses, checkpoint)
+        try:
+            for ((r, c), chance, length) in solving:
+                report((r, c), chance, length)
         except ZeroDivisionError:
+            return IMPOSSIBLE
+        return ''
+
+    # Autoguessing in the background. The search runs in its own thread and
+    # hands each change to run() through a queue, so only run() touches the
+    # screen and keys keep working. The search stops at a checkpoint before
+    # every guess and change, and at least every so often inside the longer
+    # solvers. Pausing holds it at the next one, to carry on exactly from
+    # there, and anything that reads the reverser or guesses holds it there
+    # while it does. While it runs, only keys that just look are let
+    # through; while it's paused, changing the guesses stops it, leaving
+    # the guesses it had made for the next autoguess to start from.
+
+    def busy(self):
+        return self._worker is not None
+
+    def paused(self):
+        return self.busy() and not self._running.is_set()
+
+    def _start_autoguess(self):
+        self._cancel.clear()
+        self._parked.clear()
+        self._running.set()
+        self.status_line = AUTOGUESSING
+        self._draw_status_line()
+        self._worker = threading.Thread(target=self._background)
+        self._worker.daemon = True
+        self._worker.start()
+
+    def _background(self):
+        # The last event is (None, the status line to show).
+        status = ''
+        try:
+            status = self._autoguess(self._post, self._checkpoint)
+        except Cancelled:
+            pass
+        except Exception as e:
+            status = '\x1b[48;5;196m%s: %s\x1b[0m' % (e.__class__.__name__, e)
+        finally:
+            self._events.put((None, status))
+
+    def _checkpoint(self):
+        # Called from the search: wait here while it's held, and give up if
+        # it has been stopped.
+        if not self._running.is_set():
+            self._parked.set()
+            self._running.wait()
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def _post(self, (row, column), chance, length):
+        self._checkpoint()
+        self._events.put(((row, column), chance, length))
+
+    def _carry_on(self):
+        self._parked.clear()
+        self._running.set()
+
+    @contextlib.contextmanager
+    def _held(self):
+        # Gives whether the reverser and guesses are safe to read: true
+        # unless a background autoguess didn't reach a checkpoint in time.
+        if not self.busy():
+            yield True
+            return
+        running = self._running.is_set()
+        self._running.clear()
+        try:
+            yield self._parked.wait(HOLD_WAIT)
+        finally:
+            if running:
+                self._carry_on()
+
+    def _pause_autoguess(self):
+        self._running.clear()
+        self.status_line = PAUSED
+
+    def _resume_autoguess(self):
+        self.status_line = AUTOGUESSING
+        self._carry_on()
+
+    def _stop_autoguess(self, wait=HOLD_WAIT):
+        # Stop the background autoguess at its next checkpoint, keeping the
+        # guesses it had made, and wait up to wait seconds for it to go.
+        # Returns whether it has.
+        if self._worker is None:
+            return True
+        self._cancel.set()
+        self._carry_on()
+        self._worker.join(wait)
+        if self._worker.is_alive():
             return False
+        self._drain()
         return True
 
-    def autoguess(self):
-        self.status_line = '\x1b[48;5;21mAutoguessing...\x1b[0m'
-        self._draw_status_line()
-        last_failure = None
+    def _drain(self):
+        # Draw whatever the background autoguess has changed.
         while True:
-            ok = self._eval_and_draw()
-            if ok:
-                # Find the next unguessed spot.
-                last_failure = None
-                rc = self.reverser.next_guessable()
-                if rc is None:
-                    self.status_line = ''
-                    self._draw_status_line()
-                    return  # Nothing more to guess.
-                # Guess that the next spot in the list was DEAD.
-                self.guesses.append(rc, 0)
-
-            else:
-                # Failure. Remove the last guess from the list.
-                last_failure = self.guesses.pop()
-                if last_failure is None:
-                    # Uh oh.
-                    self.status_line = '\x1b[48;5;196mImpossible!\x1b[0m'
-                    self._draw_status_line()
-                    return
-                rc, failed_guess = last_failure
-                if failed_guess == 0:
-                    # That spot wasn't DEAD. Try ALIVE.
-                    self.guesses.append(rc, 1)
-                else:
-                    # It wasn't ALIVE either. Unwind.
-                    while failed_guess == 1:
-                        last_failure = self.guesses.pop()
-                        rc, failed_guess = last_failure
-                    self.guesses.append(rc, 1)
-        self.status_line = ''
-        self._draw_status_line()
-        self._draw_reverser()
+            try:
+                event = self._events.get_nowait()
+            except Queue.Empty:
+                break
+            if event[0] is None:
+                # It has nothing left to do but return.
+                self._worker.join(HOLD_WAIT)
+                self._worker = None
+                self.status_line = event[1]
+                self.draw()
+                continue
+            self._draw_one_guess(*event, flush=False)
+        self.screen.flush()
+
+    def _next_key(self):
+        # Keep drawing the background autoguess until a key comes.
+        while True:
+            self._drain()
+            timeout = None
+            if self.busy():
+                timeout = 1.0 / (self.screen.fps or 100)
+            ch = getch(timeout)
+            if ch is not None:
+                return ch
 
     def _draw_reverser(self):
         if self.reverser is None:
             return
-
-        cloud = self.reverser.cloud
-
-        NORMAL = '\x1b[0m'
-
-        ro, co = 2, 2
-        if self.reverser is not None:
-            for r, row in enumerate(cloud):
-                R = [self._one_cell(ch, le) for (ch, le) in row]
-                move_cursor(ro + r, co)
-                emit(''.join(R) + NORMAL)
-            move_cursor(self.automata.rows + 3, 2)
+        for r, row in enumerate(self.reverser.cloud):
+            for c, (chance, length) in enumerate(row):
+                self._draw_one_guess((r, c), chance, length, flush=False)
 
     def _one_cell(self, chance, length):
         if not length:
@@ -153,25 +297,25 @@ class Interface(object):
             face = '%02i' % length
         return '\x1b[48;5;%im%s' % (ansi_grey, face)
 
-    def _draw_one_guess(self, (row, column), chance, length):
-        NORMAL = '\x1b[0m'
+    def _draw_one_guess(self, (row, column), chance, length, flush=True):
+        # While the board is changing, the screen catches up a frame at a
+        # time.
         ro, co = 2, 2
-        move_cursor(ro + row, co + (column * 2))
-        emit(self._one_cell(chance, length) + NORMAL)
+        self.screen.put(ro + row, co + (column * 2),
+                        self._one_cell(chance, length) + NORMAL)
+        if flush:
+            self.screen.flush()
 
     def _draw_automata(self):
-        NORMAL = chr(27) + '[0m'
         tf = {
             0: '\x1b[48;5;16m  ',
             1: '\x1b[48;5;231m[]',
         }
         ro, co = 2, (2 * self.columns) + 6
         for row in range(self.automata.rows):
-            R = [self.automata.cell_at(row, column)
-                 for column in range(self.automata.columns)]
-            R = [tf[cell] for cell in R]
-            move_cursor(ro + row, co)
-            emit(''.join(R) + NORMAL)
+            for column in range(self.automata.columns):
+                cell = self.automata.cell_at(row, column)
+                self.screen.put(ro + row, co + (column * 2), tf[cell] + NORMAL)
 
     def _draw_guesses(self):
         if not self.show_guesses:
@@ -182,8 +326,7 @@ class Interface(object):
         }
         for (row, column), state in self.guesses.as_dict().items():
             R, C = row + 2, (column * 2) + 2
-            move_cursor(R, C)
-            emit(tf[state])
+            self.screen.put(R, C, tf[state])
 
     def _draw_cursor(self):
         face = '  '
@@ -191,8 +334,8 @@ class Interface(object):
         g = self.guesses.get((self.cursor_row, self.cursor_column))
         if g is None:
             if self.reverser is not None:
-                alibi_here = self.reverser.alibi_at(self.cursor_row, self.cursor_column)
-                face = '%2i' % min(99, len(alibi_here))
+                length = self.reverser.length_at(self.cursor_row, self.cursor_column)
+                face = '%2i' % min(99, length)
                 g = self.reverser.alive_at(self.cursor_row, self.cursor_column)
         if g == 0.0:
             face = '  '
@@ -200,28 +343,31 @@ class Interface(object):
             face = '<>'
         if g == 1.0:
             face = '[]'
-        move_cursor(self.cursor_row + 2, self.cursor_column * 2 + 2)
-        emit('\x1b[48;5;18m%s\x1b[0m' % face)
-
-    def _draw_status_line(self):
-        move_cursor(self.automata.rows + 3, 2)
-        emit(' ' * self.automata.columns * 2)
-        if not self.status_line:
-            return
-        move_cursor(self.automata.rows + 3, 2)
-        emit(self.status_line)
+        self.screen.put(self.cursor_row + 2, self.cursor_column * 2 + 2,
+                        '\x1b[48;5;18m%s\x1b[0m' % face)
+
+    def _draw_status_line(self, flush=True):
+        stats = getattr(self.reverser, 'stats', None)
+        if stats is not None:
+            self.screen.put(self.automata.rows + 4, 2, '\x1b[K%s' % stats, 0)
+        self.screen.put(self.automata.rows + 3, 2,
+                        '\x1b[K%s' % self.status_line, 0)
+        if flush:
+            self.screen.flush(force=True)
+
+    def _draw_arrow(self):
+        self.screen.put((self.automata.rows / 2) + 2,
+                        self.automata.columns * 2 + 3, '>>')
 
     def draw(self):
-        self._draw_reverser()
-        self._draw_guesses()
+        with self._held() as held:
+            if held:
+                self._draw_reverser()
+                self._draw_guesses()
+                self._draw_cursor()
         self._draw_automata()
-
-        move_cursor((self.automata.rows / 2) + 2, self.automata.columns * 2 + 3)
-        emit(">>")
-
-        self._draw_cursor()
+        self._draw_arrow()
         self._draw_status_line()
-        move_cursor(self.automata.rows + 3, 2)
 
     def _cursor_up(self):
         self.cursor_row = max(0, self.cursor_row - 1)
@@ -263,7 +409,6 @@ class Interface(object):
         self.show_50s = not self.show_50s
 
     def _reguess(self):
-        self.reverser.reset()
         self.guess()
 
     def _zap(self):
@@ -273,22 +418,29 @@ class Interface(object):
         self.cursor_row, self.cursor_column, = rc
 
     def save(self, problem='original.gol', solution='solution.gol'):
-        with open(problem, "w") as outf:
-            outf.write("%s\n" % self.automata)
-        with open(solution, "w") as outf:
-            S = self.automata.__class__(self.reverser.bestguess())
-            outf.write("%s\n" % S)
+        self.automata.save(problem)
+        S = self.automata.__class__(self.reverser.bestguess())
+        S.rule = self.automata.rule
+        S.save(solution)
 
     def run(self):
-        erase_screen()
+        fd = sys.stdin.fileno()
+        old_settings = termios.tcgetattr(fd)
+        tty.setraw(fd)
+        try:
+            self._run()
+        finally:
+            self._stop_autoguess(1.0)
+            termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+    def _run(self):
+        self.screen.erase()
         self.draw()
         self.guess()
         while True:
             try:
                 self.draw()
-                C = None
-                while C is None:
-                    C = ord(getch())
+                C = ord(self._next_key())
                 if C in [3, 17]:
                     # Ctrl-c or Ctrl-q to quit.
                     break
@@ -307,7 +459,17 @@ class Interface(object):
                         self._cursor_right()
 
                 C = chr(C)
-                if C == 'a':
+                if self.paused() and C in 'adu':
+                    if not self._stop_autoguess():
+                        continue
+                elif self.busy() and C in 'adu;':
+                    # These would change the board under the search.
+                    continue
+
+                if C == 'x':
+                    if self.busy() and not self.paused():
+                        self._pause_autoguess()
+                elif C == 'a':
                     self._cursor_alive()
                 elif C == 'd':
                     self._cursor_dead()
@@ -322,29 +484,33 @@ class Interface(object):
                     self._toggle_50s()
 
                 elif C == '!':
-                    self.autoguess()
+                    if self.paused():
+                        self._resume_autoguess()
+                    elif not self.busy():
+                        self._start_autoguess()
                 elif C == ';':
                     self._zap()
 
                 elif C == 'S':
-                    self.save()
+                    with self._held() as held:
+                        if held:
+                            self.save()
+                        else:
+                            self.status_line = BUSY
             except KeyboardInterrupt:
-                erase_screen()
-                move_cursor(1, 1)
+                self.screen.erase()
                 break
 
     def autorun(self):
         try:
-            erase_screen()
+            self.screen.erase()
             self.guess()
             self.autoguess()
-            erase_screen()
+            self.screen.erase()
             self._draw_reverser()
             self._draw_automata()
-            move_cursor((self.automata.rows / 2) + 2, self.automata.columns * 2 + 3)
-            emit(">>")
-            move_cursor(self.automata.rows + 3, 2)
+            self._draw_arrow()
+            self.screen.flush(force=True)
             self.save()
         except KeyboardInterrupt:
-            erase_screen()
-            move_cursor(1, 1)
+            self.screen.erase()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+import sys
+import time
+
+# A frame buffer for the terminal.
+# Things to show are put at a position, and flush() sends only the ones
+# that differ from what's already on screen, in one write. While something
+# is changing quickly, like during propagation, flushes are held to at most
+# fps frames a second; anything held back goes out with the next frame.
+
+NORMAL = '\x1b[0m'
+
+
+class Screen(object):
+    def __init__(self, fps=30, out=None):
+        # fps of None or 0 sends every frame.
+        self.fps = fps
+        self.out = out if out is not None else sys.stdout
+        self.park = None
+        self._shown = {}
+        self._pending = {}
+        self._last = 0.0
+
+    def put(self, row, column, text, width=2):
+        # text takes up width columns on screen, from (row, column).
+        self._pending[row, column] = (text, width)
+
+    def erase(self):
+        # Clear the screen, and leave the cursor at the top left.
+        self._shown = {}
+        self._pending = {}
+        self.out.write('\x1b[2J\x1b[H')
+        self.out.flush()
+
+    def flush(self, force=False):
+        # Send a frame, unless the last one was too recent. Returns whether
+        # a frame was sent.
+        now = time.time()
+        if not force and self.fps and now - self._last < 1.0 / self.fps:
+            return False
+        self._last = now
+        chunks = []
+        at = None
+        for (row, column), (text, width) in sorted(self._pending.items()):
+            if self._shown.get((row, column)) == text:
+                continue
+            self._shown[row, column] = text
+            if at != (row, column):
+                chunks.append('\x1b[%i;%iH' % (row, column))
+            chunks.append(text)
+            at = (row, column + width)
+        self._pending = {}
+        if not chunks:
+            return True
+        if self.park is not None:
+            chunks.append('\x1b[%i;%iH' % self.park)
+        self.out.write(''.join(chunks))
+        self.out.flush()
+        return True
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+import collections
+import heapq
+
+# The cells waiting to be revised during propagation.
+# Each cell is queued at most once, and cells off the board are never queued.
+
+
+class Agenda(object):
+    def __init__(self, rows, columns, key=None):
+        # With a key, the cell with the smallest key(row, column) comes out
+        # first. Without one, cells come out in the order they went in.
+        self.rows = rows
+        self.columns = columns
+        self.key = key
+        self._pending = {}
+        self._fifo = collections.deque()
+        self._heap = []
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __nonzero__(self):
+        return bool(self._pending)
+
+    __bool__ = __nonzero__
+
+    def __contains__(self, rc):
+        return rc in self._pending
+
+    def add(self, row, column):
+        if not (0 <= row < self.rows and 0 <= column < self.columns):
+            return
+        rc = (row, column)
+        if self.key is None:
+            if rc not in self._pending:
+                self._pending[rc] = None
+                self._fifo.append(rc)
+            return
+        # A queued cell may have shrunk since; move it up if so.
+        k = self.key(row, column)
+        if rc not in self._pending or k < self._pending[rc]:
+            self._pending[rc] = k
+            heapq.heappush(self._heap, (k, rc))
+
+    def extend(self, coords):
+        for row, column in coords:
+            self.add(row, column)
+
+    def pop(self):
+        if self.key is None:
+            rc = self._fifo.popleft()
+            del self._pending[rc]
+            return rc
+        while True:
+            k, rc = heapq.heappop(self._heap)
+            if rc in self._pending and self._pending[rc] == k:
+                del self._pending[rc]
+                return rc
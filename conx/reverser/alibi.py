@@ -3,30 +3,110 @@
 import history
 
 # Alibi functions.
+# An alibi is a set of histories, stored as a 512-bit integer.
+# Bit h is set if history h is still a possibility.
+
+DEAD = 0
+ALIVE = 1
+
+NOTHING = 0
+EVERYTHING = (1 << 512) - 1
+
+
+def from_histories(histories):
+    alibi = NOTHING
+    for h in histories:
+        alibi |= 1 << h
+    return alibi
+
+
+def histories(alibi):
+    # Every history in an alibi, lowest first.
+    while alibi:
+        lowest = alibi & -alibi
+        yield lowest.bit_length() - 1
+        alibi ^= lowest
+
+
+def size(alibi):
+    return bin(alibi).count('1')
+
+
+# Every history whose center cell was ALIVE.
+CENTER_ALIVE = from_histories(h for h in range(512)
+                              if history.c(h) == history.ALIVE)
+
+
+# The edges of the board a cell can lie against, as bits of a border, and
+# the neighbors each one leaves DEAD.
+TOP, BOTTOM, LEFT, RIGHT = 1, 2, 4, 8
+BEYOND = {TOP: ('nw', 'n', 'ne'), BOTTOM: ('sw', 's', 'se'),
+          LEFT: ('nw', 'w', 'sw'), RIGHT: ('ne', 'e', 'se')}
+
+# Masks for every criterion but Z, and the alibis cells start with, by
+# (rule, what the cell became, border). Shared by every Detective.
+_MASKS = {}
+_STARTS = {}
+
 
 class Detective(object):
-    def __init__(self, rule):
+    def __init__(self, rule, stats=None):
         self.historian = history.Historian(rule)
+        self.stats = stats
+
+    def mask(self, query, value):
+        # All the histories that pass a single criterion, like nw=0 or Z=1.
+        if query == 'Z':
+            # The rule has these ready.
+            return self.historian.rule.masks[value]
+        key = (query, value)
+        if key not in _MASKS:
+            _MASKS[key] = from_histories(
+                h for h in range(512)
+                if self.historian.check(h, **{query: value}))
+        return _MASKS[key]
+
+    def start(self, value, border=0):
+        # The alibi of a cell that became value, before anything else is
+        # known: every history the rule turns into value, with every cell
+        # beyond the edges in border DEAD.
+        key = (self.historian.rule, value, border)
+        if key not in _STARTS:
+            alibi = self.mask('Z', value)
+            for edge, beyond in BEYOND.items():
+                if border & edge:
+                    for query in beyond:
+                        alibi &= self.mask(query, DEAD)
+            _STARTS[key] = alibi
+        return _STARTS[key]
 
     def narrow(self, alibi, **criteria):
         # Eliminate from an alibi all histories that don't meet all of
         # the criteria. Criteria are of the form NW=1, Z=0, nw=0
-        return [h for h in alibi if self.historian.check(h, **criteria)]
+        if self.stats is not None:
+            self.stats.count('narrows')
+        for query, value in criteria.items():
+            alibi &= self.mask(query, value)
+        return alibi
 
     def corroborate(self, alibi, testimony, direction):
         # Eliminate from an alibi all histories that aren't backed up by
         # any of the reports in the testimony. A testimony is an alibi
         # from a neighboring cell.
+        if self.stats is not None:
+            self.stats.count('corroborations')
         if not alibi:
             return alibi
         if not testimony:
             return alibi
-        adjusted_ts = [history.opposite(h, direction) for h in testimony]
-        return [h for h in alibi if history.cardinal(h, direction) in adjusted_ts]
+        backed = NOTHING
+        for reports, accounts in history.COMPATIBLE[direction]:
+            if testimony & reports:
+                backed |= accounts
+        return alibi & backed
 
     def was_alive(self, alibi):
         # Figure out what fraction of an alibi's histories claim c was ALIVE.
         if not alibi:
             return -1
-        live_histories = sum([self.historian.was_alive(h) for h in alibi])
-        return float(live_histories) / len(alibi)
+        return float(size(alibi & CENTER_ALIVE)) / size(alibi)
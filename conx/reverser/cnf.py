@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+
+# Satisfiability of formulas in conjunctive normal form.
+# A literal is a nonzero integer: v for variable v, -v for its negation.
+# A clause is a list of literals, at least one of which must hold.
+
+import heapq
+import os
+import subprocess
+import tempfile
+import time
+
+
+def luby(i):
+    # The i-th (1-based) term of the Luby sequence: 1 1 2 1 1 2 4 1 1 2 ...
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class Solver(object):
+    # Conflict-driven clause learning, with two watched literals per clause,
+    # first-UIP learning, activity-ordered decisions with phase saving,
+    # Luby restarts and learnt clause deletion.
+
+    restart_base = 100
+    decay = 0.95
+
+    def __init__(self, variables=0):
+        self.variables = 0
+        self.clauses = []
+        self.learnts = []
+        self.ok = True
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self._assigns = [0]
+        self._level = [0]
+        self._reason = [None]
+        self._activity = [0.0]
+        self._phase = [-1]
+        self._watches = {}
+        self._values = {}
+        self._trail = []
+        self._limits = []
+        self._qhead = 0
+        self._heap = []
+        self._inc = 1.0
+        self.grow(variables)
+
+    def grow(self, variables):
+        while self.variables < variables:
+            self.variables += 1
+            v = self.variables
+            self._assigns.append(0)
+            self._level.append(0)
+            self._reason.append(None)
+            self._activity.append(0.0)
+            self._phase.append(-1)
+            self._watches[v] = []
+            self._watches[-v] = []
+            self._values[v] = 0
+            self._values[-v] = 0
+            heapq.heappush(self._heap, (0.0, v))
+
+    def value(self, lit):
+        # 1 if the literal holds, -1 if it doesn't, 0 if it's unassigned.
+        return self._values[lit]
+
+    def add_clause(self, clause):
+        # Returns False once the formula is known to be unsatisfiable.
+        if not self.ok:
+            return False
+        self.grow(max(abs(lit) for lit in clause) if clause else 0)
+        literals = set()
+        for lit in clause:
+            if -lit in literals or self.value(lit) == 1:
+                return True
+            if self.value(lit) == 0:
+                literals.add(lit)
+        clause = sorted(literals)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._enqueue(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self._attach(clause)
+            self.clauses.append(clause)
+        return self.ok
+
+    def _attach(self, clause):
+        self._watches[clause[0]].append(clause)
+        self._watches[clause[1]].append(clause)
+
+    def _enqueue(self, lit, reason):
+        v = abs(lit)
+        self._assigns[v] = 1 if lit > 0 else -1
+        self._values[lit] = 1
+        self._values[-lit] = -1
+        self._level[v] = len(self._limits)
+        self._reason[v] = reason
+        self._trail.append(lit)
+
+    def _propagate(self):
+        # Unit propagation. Returns a conflicting clause, or None.
+        values = self._values
+        watches = self._watches
+        trail = self._trail
+        while self._qhead < len(trail):
+            false_lit = -trail[self._qhead]
+            self._qhead += 1
+            self.propagations += 1
+            watching = watches[false_lit]
+            kept = []
+            keep = kept.append
+            for index, clause in enumerate(watching):
+                first = clause[0]
+                if first == false_lit:
+                    first = clause[0] = clause[1]
+                    clause[1] = false_lit
+                a = values[first]
+                if a == 1:
+                    keep(clause)
+                    continue
+                k = 2
+                for lit in clause[2:]:
+                    if values[lit] != -1:
+                        clause[1] = lit
+                        clause[k] = false_lit
+                        watches[lit].append(clause)
+                        break
+                    k += 1
+                else:
+                    keep(clause)
+                    if a == -1:
+                        kept.extend(watching[index + 1:])
+                        watches[false_lit] = kept
+                        self._qhead = len(trail)
+                        return clause
+                    self._enqueue(first, clause)
+            watches[false_lit] = kept
+        return None
+
+    def _bump(self, v):
+        self._activity[v] += self._inc
+        if self._activity[v] > 1e100:
+            self._activity = [a * 1e-100 for a in self._activity]
+            self._inc *= 1e-100
+            self._heap = [(-self._activity[u], u)
+                          for u in range(1, self.variables + 1)
+                          if not self._assigns[u]]
+            heapq.heapify(self._heap)
+        elif not self._assigns[v]:
+            heapq.heappush(self._heap, (-self._activity[v], v))
+
+    def _analyze(self, conflict):
+        # First-UIP learning. Returns the learnt clause, asserting literal
+        # first, and the level to jump back to.
+        seen = set()
+        learnt = [None]
+        pending = 0
+        lit = None
+        index = len(self._trail) - 1
+        current = len(self._limits)
+        clause = conflict
+        while True:
+            for q in (clause if lit is None else clause[1:]):
+                v = abs(q)
+                if v not in seen and self._level[v] > 0:
+                    seen.add(v)
+                    self._bump(v)
+                    if self._level[v] >= current:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+            while abs(self._trail[index]) not in seen:
+                index -= 1
+            lit = self._trail[index]
+            index -= 1
+            seen.discard(abs(lit))
+            pending -= 1
+            if not pending:
+                break
+            clause = self._reason[abs(lit)]
+        learnt[0] = -lit
+        # Drop any literal whose reason is already covered by the others.
+        seen = set(abs(q) for q in learnt)
+        learnt = [learnt[0]] + [
+            q for q in learnt[1:]
+            if self._reason[abs(q)] is None or
+            any(abs(r) not in seen and self._level[abs(r)] > 0
+                for r in self._reason[abs(q)][1:])]
+        if len(learnt) == 1:
+            return learnt, 0
+        deepest = max(range(1, len(learnt)),
+                      key=lambda i: self._level[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, self._level[abs(learnt[1])]
+
+    def _cancel(self, level):
+        if len(self._limits) <= level:
+            return
+        mark = self._limits[level]
+        for lit in self._trail[mark:]:
+            v = abs(lit)
+            self._phase[v] = self._assigns[v]
+            self._assigns[v] = 0
+            self._values[v] = self._values[-v] = 0
+            self._reason[v] = None
+            heapq.heappush(self._heap, (-self._activity[v], v))
+        del self._trail[mark:]
+        del self._limits[level:]
+        self._qhead = len(self._trail)
+
+    def _pick(self):
+        while self._heap:
+            activity, v = heapq.heappop(self._heap)
+            if not self._assigns[v] and -activity == self._activity[v]:
+                return v if self._phase[v] > 0 else -v
+        return None
+
+    def _reduce(self):
+        # Forget the longer half of the learnt clauses, except any that are
+        # currently the reason for an assignment.
+        locked = set(id(r) for r in self._reason if r is not None)
+        self.learnts.sort(key=len)
+        keep = len(self.learnts) // 2
+        forgotten = set(id(c) for c in self.learnts[keep:]
+                        if id(c) not in locked)
+        self.learnts = [c for c in self.learnts if id(c) not in forgotten]
+        for lit in self._watches:
+            self._watches[lit] = [c for c in self._watches[lit]
+                                  if id(c) not in forgotten]
+
+    def solve(self, checkpoint=None):
+        # Returns a model, a list of booleans indexed by variable,
+        # or None if there is none. checkpoint, if given, is called with no
+        # arguments at every conflict; it may block, or raise to give up.
+        if not self.ok:
+            return None
+        if self._propagate() is not None:
+            self.ok = False
+            return None
+        restarts = 1
+        budget = self.restart_base * luby(restarts)
+        max_learnts = max(1000, len(self.clauses) // 3)
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                if checkpoint is not None:
+                    checkpoint()
+                self.conflicts += 1
+                budget -= 1
+                if not self._limits:
+                    self.ok = False
+                    return None
+                learnt, level = self._analyze(conflict)
+                self._cancel(level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._attach(learnt)
+                    self.learnts.append(learnt)
+                    self._enqueue(learnt[0], learnt)
+                self._inc /= self.decay
+                continue
+            if budget <= 0:
+                restarts += 1
+                budget = self.restart_base * luby(restarts)
+                self._cancel(0)
+                if len(self.learnts) > max_learnts:
+                    self._reduce()
+                    max_learnts = int(max_learnts * 1.1)
+                continue
+            lit = self._pick()
+            if lit is None:
+                model = [a > 0 for a in self._assigns]
+                self._cancel(0)
+                return model
+            self.decisions += 1
+            self._limits.append(len(self._trail))
+            self._enqueue(lit, None)
+
+
+class External(object):
+    # Hand the formula to a locally installed solver that reads DIMACS and
+    # answers in the usual competition format ("s SATISFIABLE", "v ..."),
+    # like kissat, cadical or glucose.
+
+    def __init__(self, command, variables=0):
+        self.command = list(command)
+        self.variables = variables
+        self.clauses = []
+
+    def add_clause(self, clause):
+        if clause:
+            self.variables = max(self.variables, max(abs(lit) for lit in clause))
+        self.clauses.append(list(clause))
+        return True
+
+    def write(self, outf):
+        outf.write('p cnf %i %i\n' % (self.variables, len(self.clauses)))
+        for clause in self.clauses:
+            outf.write(' '.join(str(lit) for lit in clause) + ' 0\n')
+
+    def solve(self, checkpoint=None):
+        # checkpoint, if given, is called with no arguments every so often
+        # while the solver runs; if it raises, the solver is killed.
+        fd, filename = tempfile.mkstemp(suffix='.cnf')
+        try:
+            with os.fdopen(fd, 'w') as outf:
+                self.write(outf)
+            with tempfile.TemporaryFile() as answer:
+                process = subprocess.Popen(self.command + [filename],
+                                           stdout=answer)
+                try:
+                    while process.poll() is None:
+                        if checkpoint is not None:
+                            checkpoint()
+                        time.sleep(0.05)
+                except BaseException:
+                    process.kill()
+                    process.wait()
+                    raise
+                answer.seek(0)
+                output = answer.read()
+        finally:
+            os.remove(filename)
+        model = [False] * (self.variables + 1)
+        satisfiable = None
+        for line in output.decode().splitlines():
+            if line.startswith('s '):
+                satisfiable = line.split()[1] == 'SATISFIABLE'
+            elif line.startswith('v '):
+                for lit in line.split()[1:]:
+                    lit = int(lit)
+                    if 0 < lit <= self.variables:
+                        model[lit] = True
+        if satisfiable is None:
+            raise RuntimeError('%s gave no answer' % self.command[0])
+        return model if satisfiable else None
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+import heapq
+import math
+
+import alibi
+
+# Branching heuristics: which undecided cell to guess next.
+# Each keeps a heap of the undecided cells keyed by how good a guess they'd
+# make, smallest first. The reverser calls update() whenever an alibi
+# changes, so picking the next cell never needs a scan of the board.
+
+
+class Heuristic(object):
+    # Whether a cell's key also depends on its neighbors.
+    neighborly = False
+
+    def __init__(self, reverser):
+        self.reverser = reverser
+        self._keys = None
+        self._heap = []
+
+    def key(self, row, column, alibi_here):
+        raise NotImplementedError()
+
+    def _key_at(self, row, column):
+        alibi_here = self.reverser.alibis[row][column]
+        if not alibi_here or undecided(alibi_here) is None:
+            return None
+        return self.key(row, column, alibi_here)
+
+    def _refresh(self, row, column):
+        k = self._key_at(row, column)
+        self._keys[row, column] = k
+        if k is not None:
+            heapq.heappush(self._heap, (k, row, column))
+
+    def rebuild(self):
+        self._keys = {}
+        self._heap = []
+        for row in range(self.reverser.rows):
+            for column in range(self.reverser.columns):
+                self._refresh(row, column)
+
+    def update(self, row, column):
+        if self._keys is None:
+            return
+        self._refresh(row, column)
+        if self.neighborly:
+            for (nrow, ncol), _ in self.reverser.neighbors(row, column):
+                self._refresh(nrow, ncol)
+        if len(self._heap) > 4 * len(self._keys) + 64:
+            self._heap = [(k, row, column)
+                          for (row, column), k in self._keys.items()
+                          if k is not None]
+            heapq.heapify(self._heap)
+
+    def best(self, cells=None):
+        # The best cell to guess next, or None if every cell is decided.
+        # cells, if given, limits the choice to those cells.
+        if self._keys is None:
+            self.rebuild()
+        if cells is not None:
+            keyed = [(self._keys[rc], rc) for rc in cells
+                     if self._keys.get(rc) is not None]
+            return min(keyed)[1] if keyed else None
+        heap = self._heap
+        while heap:
+            k, row, column = heap[0]
+            if self._keys.get((row, column)) == k:
+                return row, column
+            heapq.heappop(heap)
+        return None
+
+
+def undecided(alibi_here):
+    # The fraction of an alibi that says the cell was ALIVE, or None if
+    # every history agrees.
+    alive = alibi.size(alibi_here & alibi.CENTER_ALIVE)
+    total = alibi.size(alibi_here)
+    if alive == 0 or alive == total:
+        return None
+    return float(alive) / total
+
+
+class MostAmbiguous(Heuristic):
+    # The cell closest to a coin flip, in steps of 1%, top left first.
+    def key(self, row, column, alibi_here):
+        distance = abs(0.5 - undecided(alibi_here))
+        return (int(math.ceil(round(distance * 100, 6))), row, column)
+
+
+class MinimumRemaining(Heuristic):
+    # The cell with the fewest histories left.
+    def key(self, row, column, alibi_here):
+        return (alibi.size(alibi_here), row, column)
+
+
+class DegreeWeighted(Heuristic):
+    # The cell with the fewest histories left for each undecided neighbor,
+    # so guesses land where they'll narrow the most.
+    neighborly = True
+
+    def key(self, row, column, alibi_here):
+        degree = 0
+        for (nrow, ncol), _ in self.reverser.neighbors(row, column):
+            neighbor = self.reverser.alibis[nrow][ncol]
+            if neighbor and undecided(neighbor) is not None:
+                degree += 1
+        return (float(alibi.size(alibi_here)) / (1 + degree), row, column)
+
+
+HEURISTICS = {
+    'ambiguous': MostAmbiguous,
+    'remaining': MinimumRemaining,
+    'degree': DegreeWeighted,
+}
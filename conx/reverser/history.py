@@ -3,13 +3,13 @@
 # Operations on a single history.
 # A history is a nine-bit integer in the range [0..511].
 
+from conx.automata import rules
+
 DEAD = 0
 ALIVE = 1
 
 # Utility Functions.
 ib = lambda i: int(bool(i))
-cat = lambda b: sum([ib(v) << (len(b) - i - 1)
-                     for i, v in enumerate(b)])
 
 # Get a single cell from a history.
 nw = lambda i: ib(i & 256)
@@ -22,44 +22,20 @@ sw = lambda i: ib(i &   4)
 s  = lambda i: ib(i &   2)
 se = lambda i: ib(i &   1)
 
-# Shift a history one row in one direction and/or one column in any direction.
-# Store these as they'll be reused a lot.
-_NW, _N, _NE = {}, {}, {}
-_W,  _C, _E  = {}, {}, {}
-_SW, _S, _SE = {}, {}, {}
-
-for i in range(512):
-    _NW[i] = cat([DEAD, DEAD,  DEAD,
-                  DEAD, nw(i), n(i),
-                  DEAD, w(i),  c(i)])
-
-    _N[i]  = cat([DEAD,  DEAD, DEAD,
-                  nw(i), n(i), ne(i),
-                  w(i),  c(i), e(i)])
-
-    _NE[i] = cat([DEAD, DEAD, DEAD,
-                  DEAD, n(i), ne(i),
-                  DEAD, c(i), e(i)])
-
-    _W[i]  = cat([DEAD, nw(i), n(i),
-                  DEAD, w(i),  c(i),
-                  DEAD, sw(i), s(i)])
-
-    _E[i]  = cat([DEAD, n(i), ne(i),
-                  DEAD, c(i), e(i),
-                  DEAD, s(i), se(i)])
-
-    _SW[i] = cat([DEAD, DEAD,  DEAD,
-                  DEAD, w(i),  c(i),
-                  DEAD, sw(i), s(i)])
-
-    _S[i]  = cat([DEAD,  DEAD, DEAD,
-                  w(i),  c(i), e(i),
-                  sw(i), s(i), se(i)])
-
-    _SE[i] = cat([DEAD, DEAD, DEAD,
-                  DEAD, c(i), e(i),
-                  DEAD, s(i), se(i)])
+# What a history says about the cells it shares with a neighbor in each
+# direction, moved to where the neighbor's opposite view puts them. Each is
+# a mask and a shift, kept as a table since they'll be reused a lot.
+def _table(shift, mask):
+    return [(i >> shift) & mask for i in range(512)]
+
+_NW = _table(4, 0b000011011)
+_N  = _table(3, 0b000111111)
+_NE = _table(3, 0b000011011)
+_W  = _table(1, 0b011011011)
+_E  = _table(0, 0b011011011)
+_SW = _table(1, 0b000011011)
+_S  = _table(0, 0b000111111)
+_SE = _table(0, 0b000011011)
 
 NW = lambda h: _NW[h & 511]
 N  = lambda h: _N[h & 511]
@@ -73,36 +49,67 @@ SW = lambda h: _SW[h & 511]
 S  = lambda h: _S[h & 511]
 SE = lambda h: _SE[h & 511]
 
+CARDINAL = {
+    'NW': NW, 'N': N, 'NE': NE,
+    'W':  W,  'C': C, 'E':  E,
+    'SW': SW, 'S': S, 'SE': SE}
+
+OPPOSITE = {
+    'NW': SE, 'N': S, 'NE': SW,
+    'W':  E,  'C': C, 'E':  W,
+    'SW': NE, 'S': N, 'SE': NW}
+
+# Every criterion a history can be checked against, but Z, which depends on
+# the rule.
+CRITERIA = {
+    'NW': NW, 'N': N, 'NE': NE,
+    'W':  W,  'C': C, 'E':  E,
+    'SW': SW, 'S': S, 'SE': SE,
+    'nw': nw, 'n': n, 'ne': ne,
+    'w' : w,  'c': c, 'e' : e,
+    'sw': sw, 's': s, 'se': se,
+    }
+
+
 def cardinal(history, direction):
-    transforms = {
-        'NW': NW, 'N': N, 'NE': NE,
-        'W':  W,  'C': C, 'E':  E,
-        'SW': SW, 'S': S, 'SE': SE}
-    return transforms[direction](history & 511)
+    return CARDINAL[direction](history & 511)
 
 def opposite(history, direction):
-    transforms = {
-        'NW': SE, 'N': S, 'NE': SW,
-        'W':  E,  'C': C, 'E':  W,
-        'SW': NE, 'S': N, 'SE': NW}
-    return transforms[direction](history & 511)
+    return OPPOSITE[direction](history & 511)
+
+
+# Neighbors in a 3x3 block share a 2x2, 2x3 or 3x2 overlap, and a history
+# agrees with a neighbor's history if both say the same thing about it.
+# For each direction, group all histories by their view of that overlap,
+# as 512-bit sets: pairs of (neighbor histories, local histories) that
+# agree with each other.
+DIRECTIONS = ['NW', 'N', 'NE', 'W', 'E', 'SW', 'S', 'SE']
+
+
+def _projections(transform, direction):
+    table = {}
+    for i in range(512):
+        overlap = transform(i, direction)
+        table[overlap] = table.get(overlap, 0) | (1 << i)
+    return table
+
+COMPATIBLE = {}
+for direction in DIRECTIONS:
+    _local = _projections(cardinal, direction)
+    _neighbor = _projections(opposite, direction)
+    COMPATIBLE[direction] = [(_neighbor[overlap], _local[overlap])
+                             for overlap in sorted(_local)
+                             if overlap in _neighbor]
 
 
 class Historian(object):
     def __init__(self, rule):
-        self.rule = rule
-        self._mem = {}
+        # rule is anything rules.compile() takes.
+        self.rule = rules.compile(rule)
+        self._criteria = dict(CRITERIA, Z=self.Z)
 
     def Z(self, history):
-        if self._mem.get(history) is not None:
-            return self._mem[history]
-        center = c(history)
-        neighborcount = sum([nw(history), n(history), ne(history),
-                             w(history),              e(history),
-                             sw(history), s(history), se(history)])
-        z = (center, neighborcount) in self.rule
-        self._mem[history] = z
-        return z
+        return self.rule.outcomes[history & 511]
 
     def corroborate(self, history, report, direction):
         # Does a history jive with the report from the given direction?
@@ -113,16 +120,7 @@ class Historian(object):
     def check(self, history, **criteria):
         # Does the given history pass all the criteria?
         # Criteria are of the form NW=1, Z=0, nw=0
-        transforms = {
-            'NW': NW, 'N': N, 'NE': NE,
-            'W':  W,  'C': C, 'E':  W,
-            'SW': SW, 'S': S, 'SE': SE,
-            'nw': nw, 'n': n, 'ne': ne,
-            'w' : w,  'c': c, 'e' : e,
-            'sw': sw, 's': s, 'se': se,
-            'Z': self.Z,
-            }
-        
+        transforms = self._criteria
         for query, value in criteria.items():
             if query in transforms:
                 if transforms[query](history) != value:
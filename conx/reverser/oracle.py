@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+# A reverser that hands the whole board to a SAT solver.
+#
+# Each cell of the predecessor is a variable. Each cell's alibi becomes a set
+# of clauses over the cells in its neighborhood that forbid every history the
+# alibi rules out. Cells off the board are DEAD, so they are left out of the
+# clauses entirely. Propagation and guessing work just like in Yawnoc, and
+# the alibis they leave behind are what gets encoded.
+
+import alibi
+import cnf
+import yawnoc
+
+
+# Which neighbor each bit of a history describes.
+BITS = [(8, -1, -1), (7, -1, 0), (6, -1, 1),
+        (5,  0, -1), (4,  0, 0), (3,  0, 1),
+        (2,  1, -1), (1,  1, 0), (0,  1, 1)]
+
+# The histories where a given bit is set, or clear.
+ONES = dict((b, alibi.from_histories(h for h in range(512) if h >> b & 1))
+            for b in range(9))
+ZEROS = dict((b, alibi.EVERYTHING & ~ONES[b]) for b in range(9))
+
+
+def cube_mask(cube):
+    # All the histories matching a cube: a list of (bit, value) pairs.
+    mask = alibi.EVERYTHING
+    for b, value in cube:
+        mask &= ONES[b] if value else ZEROS[b]
+    return mask
+
+
+# Covers already worked out, by (alibi, space).
+COVERS = {}
+
+
+def cover(forbidden, space, free):
+    # Cover the forbidden histories with cubes over the free bits, growing
+    # each cube as large as it can get without admitting an allowed history.
+    # Histories outside the space can't happen, so they may be covered too.
+    allowed = space & ~forbidden
+    cubes = []
+    uncovered = forbidden
+    while uncovered:
+        h = next(alibi.histories(uncovered))
+        cube = [(b, h >> b & 1) for b in free]
+        for literal in list(cube):
+            trial = [l for l in cube if l != literal]
+            if not cube_mask(trial) & allowed:
+                cube = trial
+        cubes.append(cube)
+        uncovered &= ~cube_mask(cube)
+    return cubes
+
+
+class Oracle(yawnoc.Yawnoc):
+
+    def __init__(self, automata, solver=cnf.Solver, **kwargs):
+        # solver makes an empty formula with add_clause() and solve(),
+        # like cnf.Solver or functools.partial(cnf.External, ['kissat']).
+        super(Oracle, self).__init__(automata, **kwargs)
+        self.solver = solver
+        self.clauses = 0
+
+    def variable(self, row, column):
+        return row * self.columns + column + 1
+
+    def _clauses_at(self, row, column):
+        space = alibi.EVERYTHING
+        free = []
+        for b, dr, dc in BITS:
+            if (0 <= row + dr < self.rows and 0 <= column + dc < self.columns):
+                free.append(b)
+            else:
+                space &= ZEROS[b]
+        alibi_here = self.alibis[row][column]
+        key = (alibi_here, space)
+        if key not in COVERS:
+            COVERS[key] = cover(space & ~alibi_here, space, free)
+        for cube in COVERS[key]:
+            clause = []
+            for b, value in cube:
+                _, dr, dc = BITS[8 - b]
+                v = self.variable(row + dr, column + dc)
+                clause.append(-v if value else v)
+            yield clause
+
+    def encode(self, formula):
+        # Add the whole board's clauses to a formula.
+        seen = set()
+        for row in range(self.rows):
+            for column in range(self.columns):
+                for clause in self._clauses_at(row, column):
+                    clause = tuple(sorted(clause))
+                    if clause not in seen:
+                        seen.add(clause)
+                        formula.add_clause(list(clause))
+        self.clauses = len(seen)
+        return formula
+
+    def solve(self, guesses, checkpoint=None):
+        # Propagate the guesses, then fill in the rest of the board with
+        # whatever the solver finds. Raises ZeroDivisionError if there is
+        # no predecessor consistent with the guesses. checkpoint, if given,
+        # is handed to the solver; see Search.
+        for X in self.evaluate_guesses(guesses):
+            yield X
+        formula = self.solver(self.rows * self.columns)
+        self.encode(formula)
+        if checkpoint is None:
+            model = formula.solve()
+        else:
+            model = formula.solve(checkpoint)
+        cells = None
+        if model is not None:
+            cells = [[int(model[self.variable(row, column)])
+                      for column in range(self.columns)]
+                     for row in range(self.rows)]
+        for X in self.adopt('model', cells):
+            yield X
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+# A cache of solved groups of cells, kept on disk.
+#
+# Once propagation settles, each group of undecided cells (see
+# Yawnoc.components) can be solved on its own, and whether a choice of
+# states for its cells works depends only on the alibis of the cells
+# around it. Those alibis, laid out relative to the group and turned to
+# whichever of the square's eight symmetries sorts first, make the key, so
+# a pattern is found again however it's placed or turned. A key leads to
+# the states that solved the group, or to None if it had no solution.
+# Keys are sha1 digests, and the cache is an sqlite database: any number
+# of processes can share one, and once it holds more than limit patterns,
+# the least recently used go. Lookups don't write: when each pattern was
+# last used is kept in memory, and saved with the next pattern remembered
+# or on close().
+
+import hashlib
+import json
+import sqlite3
+import time
+
+import symmetry
+
+SCHEMA = '''CREATE TABLE IF NOT EXISTS patterns
+            (key TEXT PRIMARY KEY, states TEXT, used REAL)'''
+
+
+class PatternCache(object):
+
+    def __init__(self, path, limit=10000, largest=4096):
+        # Groups of more than largest cells are left to the search.
+        self.path = path
+        self.limit = limit
+        self.largest = largest
+        self.hits = 0
+        self.misses = 0
+        # When each pattern recalled since the last save was used.
+        self._used = {}
+        # The interface opens the cache, and autoguesses in the background
+        # with it; only one thread uses it at a time.
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def close(self):
+        if self._used:
+            self._save_used()
+            self._db.commit()
+        self._db.close()
+
+    def _save_used(self):
+        self._db.executemany('UPDATE patterns SET used = ? WHERE key = ?',
+                             [(used, digest)
+                              for digest, used in self._used.items()])
+        self._used.clear()
+
+    def key(self, reverser, cells):
+        # The key for a group of cells as the reverser has it now, or None
+        # if the group is too large to cache. Keep it to recall or remember
+        # the group by.
+        if self.largest is not None and len(cells) > self.largest:
+            return None
+        around = set()
+        for row, column in cells:
+            around.update((r, c) for r in (row - 1, row, row + 1)
+                          for c in (column - 1, column, column + 1)
+                          if 0 <= r < reverser.rows and 0 <= c < reverser.columns)
+        top = min(r for r, c in around)
+        left = min(c for r, c in around)
+        rows = max(r for r, c in around) - top + 1
+        columns = max(c for r, c in around) - left + 1
+        best = None
+        for index, (transpose, _, _) in enumerate(symmetry.SYMMETRIES):
+            shape = (columns, rows) if transpose else (rows, columns)
+            layout = sorted((symmetry.place(index, r - top, c - left,
+                                            rows, columns),
+                             symmetry.turn(index, reverser.alibis[r][c]))
+                            for r, c in around)
+            candidate = (shape, layout)
+            if best is None or candidate < best[0]:
+                best = (candidate, index)
+        candidate, index = best
+        digest = hashlib.sha1(repr(candidate)).hexdigest()
+        return digest, (index, top, left, rows, columns)
+
+    def recall(self, key):
+        # {(row, column): state} for the group, or None if it has no
+        # solution. Raises KeyError if it hasn't been seen.
+        digest, (index, top, left, rows, columns) = key
+        found = self._db.execute('SELECT states FROM patterns WHERE key = ?',
+                                 (digest,)).fetchone()
+        if found is None:
+            self.misses += 1
+            raise KeyError(digest)
+        self.hits += 1
+        self._used[digest] = time.time()
+        saved = json.loads(found[0])
+        if saved is None:
+            return None
+        placed = dict(((row, column), state) for row, column, state in saved)
+        states = {}
+        for row in range(top, top + rows):
+            for column in range(left, left + columns):
+                spot = symmetry.place(index, row - top, column - left,
+                                      rows, columns)
+                if spot in placed:
+                    states[row, column] = placed[spot]
+        return states
+
+    def remember(self, key, states):
+        # Save {(row, column): state} for the group, or None if it has no
+        # solution.
+        digest, (index, top, left, rows, columns) = key
+        saved = None
+        if states is not None:
+            saved = sorted(symmetry.place(index, row - top, column - left,
+                                          rows, columns) + (state,)
+                           for (row, column), state in states.items())
+        self._used.pop(digest, None)
+        self._save_used()
+        self._db.execute('INSERT OR REPLACE INTO patterns VALUES (?, ?, ?)',
+                         (digest, json.dumps(saved), time.time()))
+        excess = self._db.execute('SELECT COUNT(*) FROM patterns').fetchone()[0]
+        excess -= self.limit
+        if excess > 0:
+            self._db.execute('DELETE FROM patterns WHERE key IN (SELECT key '
+                             'FROM patterns ORDER BY used LIMIT ?)', (excess,))
+        self._db.commit()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+# Reversal over several generations.
+#
+# Each stage finds predecessors of the board the stage before it picked.
+# Stages only search as far as they're asked to: a stage pulls a few
+# candidates at a time, tries the easiest to reverse first, and if a later
+# stage runs dry it moves on to its next candidate rather than starting
+# over.
+
+import itertools
+
+import search
+import yawnoc
+
+
+def fewest_live(automata, reverser_class):
+    # Sparse boards have fewer ways to have come about.
+    return sum(sum(row) for row in automata.cells)
+
+
+def least_ambiguous(automata, reverser_class):
+    # Count the cells propagation alone can't settle. A board with no
+    # predecessor at all goes last.
+    reverser = reverser_class(automata)
+    try:
+        for _ in reverser.corroborate():
+            pass
+    except ZeroDivisionError:
+        return float('inf')
+    return sum(1 for row in reverser.cloud
+               for chance, length in row
+               if 0.0 < chance < 1.0)
+
+
+SCORES = {
+    'live': fewest_live,
+    'ambiguous': least_ambiguous,
+}
+
+
+class Pipeline(object):
+
+    def __init__(self, automata, generations, reverser_class=yawnoc.Yawnoc,
+                 width=4, score=fewest_live):
+        # width is how many candidates a stage gathers before ranking them.
+        # score ranks a candidate, lowest first; see SCORES.
+        self.automata = automata
+        self.generations = generations
+        self.reverser_class = reverser_class
+        self.width = width
+        self.score = SCORES.get(score, score)
+
+    def candidates(self, automata):
+        # Predecessors of a board, best first within each batch.
+        reverser = self.reverser_class(automata)
+        solutions = search.Search(reverser).solutions()
+        while True:
+            batch = [automata.__class__(cells, rule=automata.rule)
+                     for cells in itertools.islice(solutions, self.width)]
+            if not batch:
+                return
+            batch.sort(key=lambda c: self.score(c, self.reverser_class))
+            for candidate in batch:
+                yield candidate
+
+    def chains(self):
+        # Every chain of boards, earliest first, ending with the target.
+        if self.generations < 1:
+            yield [self.automata]
+            return
+        chain = [self.automata]
+        stages = [self.candidates(self.automata)]
+        while stages:
+            if len(chain) > self.generations:
+                yield list(reversed(chain))
+                chain.pop()
+                continue
+            candidate = next(stages[-1], None)
+            if candidate is None:
+                # A dead end: back up and try the previous stage's next pick.
+                stages.pop()
+                chain.pop()
+                continue
+            chain.append(candidate)
+            if len(chain) <= self.generations:
+                stages.append(self.candidates(candidate))
+
+    def run(self):
+        # The first chain found, or None if there isn't one.
+        return next(self.chains(), None)
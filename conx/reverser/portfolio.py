@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+# Several searches racing each other across a pool of processes.
+#
+# How long a search takes depends a great deal on which cells it guesses
+# and which state it tries first, and a bad pick on one board is often a
+# good one on the next. So the board is propagated once, and each worker
+# starts from those alibis with its own heuristic, order and seed. Whichever
+# finishes first wins and the rest are stopped: a predecessor is good as
+# any other, and a search that runs out proves there is none.
+
+import itertools
+import multiprocessing
+
+import heuristic
+import search
+import yawnoc
+from conx.automata import conway
+
+
+ORDERS = ('dead', 'alive', 'random')
+
+
+def assorted(count):
+    # count strategies, as (branching, order, seed), covering every
+    # heuristic and order before repeating any with a new seed.
+    mixes = [(branching, order)
+             for order in ORDERS
+             for branching in sorted(heuristic.HEURISTICS)]
+    return [(branching, order, seed)
+            for seed, (branching, order) in
+            zip(range(count), itertools.cycle(mixes))]
+
+
+def search_worker(job):
+    # A predecessor, or None if there isn't one.
+    cells, rule, alibis, (branching, order, seed) = job
+    automata = conway.Conway(cells)
+    automata.rule = rule
+    reverser = yawnoc.Yawnoc(automata, branching=branching)
+    for row, alibi_row in enumerate(alibis):
+        for column, alibi_there in enumerate(alibi_row):
+            reverser.restrict(row, column, alibi_there)
+    if search.Search(reverser, order=order, seed=seed).solve():
+        return reverser.bestguess()
+    return None
+
+
+def _tagged(indexed_job):
+    index, job = indexed_job
+    return index, search_worker(job)
+
+
+class Portfolio(object):
+
+    def __init__(self, automata, reverser, processes=None, strategies=None):
+        # reverser holds the alibis every worker starts from. strategies
+        # defaults to one per process.
+        self.automata = automata
+        self.reverser = reverser
+        self.processes = processes or multiprocessing.cpu_count()
+        self.strategies = strategies or assorted(self.processes)
+        self.winner = None
+
+    def solve(self, checkpoint=None):
+        # A predecessor, or None if there isn't one. self.winner is the
+        # strategy that got there first. checkpoint, if given, is called
+        # with no arguments every so often while the workers run; if it
+        # raises, they are stopped.
+        alibis = [row[:] for row in self.reverser.alibis]
+        jobs = [(self.automata.cells, self.automata.rule, alibis, strategy)
+                for strategy in self.strategies]
+        pool = multiprocessing.Pool(min(self.processes, len(jobs)))
+        try:
+            results = pool.imap_unordered(_tagged, enumerate(jobs))
+            while True:
+                if checkpoint is not None:
+                    checkpoint()
+                try:
+                    index, cells = results.next(0.1)
+                    break
+                except multiprocessing.TimeoutError:
+                    pass
+        finally:
+            pool.terminate()
+            pool.join()
+        self.winner = self.strategies[index]
+        return cells
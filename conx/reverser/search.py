@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+
+import random
+
+from conx.common.guess import Guesses
+from conx.common.nogood import Nogoods
+
+
+class Search(object):
+    # Depth-first search for predecessors, one guess at a time.
+    #
+    # On a contradiction the search remembers the guesses to blame as a
+    # nogood, and jumps straight back to the latest of them to try its other
+    # state. If that state was already forced, its reasons are to blame too,
+    # and the unwinding continues.
+    #
+    # Once propagation settles, the undecided cells often fall into groups
+    # that share no neighborhood. Each group is then searched on its own,
+    # so running out of options in one never unwinds the guesses made in
+    # another, and predecessors are counted group by group and multiplied.
+    #
+    # If the target has any symmetries, solve() first looks for a
+    # predecessor with the same ones, which only has to be searched for
+    # across one part of the board. If there isn't one, it looks again
+    # without them.
+
+    def __init__(self, reverser, guesses=None, nogoods=None, report=None,
+                 order='dead', seed=None, cells=None, cache=None,
+                 symmetric=True, checkpoint=None):
+        # report, if given, is called with ((row, column), chance, length)
+        # for every cell that changes along the way. order names the state
+        # each spot is guessed to have had first: 'dead', 'alive', or
+        # 'random', drawn from seed. cells, if given, limits guessing to
+        # those cells, and the guesses given are then kept as they are.
+        # cache, if given, is a patterns.PatternCache to look each group of
+        # undecided cells up in before searching it, and to save it to after.
+        # Without symmetric, solve() doesn't try symmetric predecessors
+        # first. checkpoint, if given, is called with no arguments before
+        # every guess; it may block to hold the search there, or raise to
+        # stop it.
+        self.reverser = reverser
+        self.cells = cells
+        self.cache = cache
+        self.symmetric = symmetric
+        # Stats, if the reverser keeps them.
+        self.stats = getattr(reverser, 'stats', None)
+        self.order = order
+        self.random = random.Random(seed)
+        self.guesses = guesses if guesses is not None else Guesses()
+        # How many of the guesses this search may not unwind.
+        self.fixed = len(self.guesses) if cells is not None else 0
+        self.nogoods = nogoods if nogoods is not None else Nogoods()
+        self.report = report
+        self.checkpoint = checkpoint
+        # Why each guess was made: None for a free choice, or else the
+        # guesses that forced it.
+        self.reasons = [None] * len(self.guesses)
+        # How many guesses this search has made, flips included.
+        self.guessed = 0
+
+    def _evaluate(self):
+        try:
+            for ((r, c), chance, length) in self.reverser.evaluate_guesses(self.guesses):
+                if self.report is not None:
+                    self.report((r, c), chance, length)
+        except ZeroDivisionError:
+            return False
+        return True
+
+    def solutions(self):
+        # Every predecessor, as the reverser's bestguess(), one at a time.
+        # Nogoods learnt after the first one only hold for this search, as
+        # they include the solutions already given.
+        while True:
+            if self.checkpoint is not None:
+                self.checkpoint()
+            if self._evaluate():
+                # Find the next unguessed spot.
+                rc = self.reverser.next_guessable(self.cells)
+                if rc is None:
+                    yield self.reverser.bestguess()
+                    # These guesses pin down that predecessor; rule it out.
+                    conflict = set(self.guesses.decisions())
+                else:
+                    conflict = self._choose(rc)
+                    if conflict is None:
+                        continue
+            else:
+                conflict = set(self.reverser.conflict)
+            if not self._backjump(conflict):
+                return
+
+    def solve(self):
+        # Find one predecessor. Returns False if there isn't one.
+        if self.stats is not None:
+            with self.stats.phase('search'):
+                return self._solve()
+        return self._solve()
+
+    def _solve(self):
+        symmetries = getattr(self.reverser, 'symmetries', None)
+        if self.cells is None and self.symmetric and symmetries:
+            if self._solve_tied(symmetries):
+                return True
+        return self._solve_untied()
+
+    def _solve_tied(self, symmetries):
+        # Look for a predecessor with the target's symmetries. If there is
+        # one, make the same guesses at every image of the ones that found
+        # it, and finish from there without them. Nothing learnt along the
+        # way holds without them, so nogoods are kept apart and nothing is
+        # cached.
+        given = len(self.guesses)
+        nogoods, cache = self.nogoods, self.cache
+        self.nogoods, self.cache = Nogoods(), None
+        self.reverser.tie(symmetries)
+        try:
+            solved = self._solve_untied()
+            if solved:
+                images = [(image, state)
+                          for (row, column), state in self.guesses.decisions()
+                          for _, image in self.reverser.images(row, column)]
+        finally:
+            self.nogoods, self.cache = nogoods, cache
+            self.reverser.untie()
+        if solved:
+            # Guesses forced under the ties may be free without them.
+            self.reasons[given:] = [None] * (len(self.reasons) - given)
+            for rc, state in images:
+                if self.guesses.get(rc) is None:
+                    self.guesses.append(rc, state)
+                    self.reasons.append(None)
+            if self._solve_untied():
+                return True
+        self._unwind(given)
+        return False
+
+    def _solve_untied(self):
+        if self.cells is None and self._evaluate():
+            groups = self.reverser.components()
+            if len(groups) > 1 or (groups and self.cache is not None):
+                if self._solve_groups(groups):
+                    return True
+                # Without guesses to blame, that group has no solution at
+                # all, and neither does the board.
+                if not self.guesses.decisions():
+                    return False
+        return self._solve_whole()
+
+    def _solve_whole(self):
+        for _ in self.solutions():
+            return True
+        return False
+
+    def _search(self, guesses, nogoods, cells):
+        # A search of just these cells, carrying on from this one.
+        return Search(self.reverser, guesses, nogoods, self.report,
+                      self.order, self.random.random(), cells,
+                      checkpoint=self.checkpoint)
+
+    def _solve_groups(self, groups):
+        # Solve each group in turn, keeping the guesses that solved the
+        # ones before. If one has no solution, the guesses given are wrong,
+        # and are put back as they were.
+        given = len(self.guesses)
+        for cells in groups:
+            if not self._solve_group(cells):
+                self._unwind(given)
+                return False
+        return self._evaluate()
+
+    def _unwind(self, given):
+        while len(self.guesses) > given:
+            self.guesses.pop()
+        del self.reasons[given:]
+
+    def _solve_group(self, cells):
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(self.reverser, cells)
+        if key is not None:
+            try:
+                states = self.cache.recall(key)
+            except KeyError:
+                pass
+            else:
+                if states is None:
+                    return False
+                given = len(self.guesses)
+                for rc in cells:
+                    self.guesses.append(rc, states[rc])
+                    self.reasons.append(None)
+                if self._evaluate():
+                    return True
+                # Not what was saved after all; search it instead.
+                self._unwind(given)
+        search = self._search(self.guesses, self.nogoods, cells)
+        solved = search._solve()
+        self.guessed += search.guessed
+        if solved:
+            self.reasons.extend(search.reasons[len(self.reasons):])
+        if key is not None:
+            states = None
+            if solved:
+                states = dict(((r, c), int(self.reverser.alive_at(r, c) == 1.0))
+                              for r, c in cells)
+            self.cache.remember(key, states)
+        return solved
+
+    def count(self):
+        # How many predecessors there are that keep the guesses, counting
+        # each group apart and multiplying. The guesses are left as given.
+        if not self._evaluate():
+            return 0
+        total = 1
+        for cells in self.reverser.components():
+            # Nogoods that rule out solutions already counted only hold
+            # for that group's search.
+            search = self._search(self.guesses.copy(), Nogoods(), cells)
+            total *= sum(1 for _ in search.solutions())
+            self.guessed += search.guessed
+            if not total:
+                break
+        self._evaluate()
+        return total
+
+    def _guessed(self):
+        self.guessed += 1
+        if self.stats is not None:
+            self.stats.count('guesses')
+
+    def _first(self):
+        if self.order == 'alive':
+            return 1
+        if self.order == 'random':
+            return self.random.randint(0, 1)
+        return 0
+
+    def _choose(self, rc):
+        # Guess the spot's first state in order, unless a nogood says
+        # otherwise. Returns the conflicting guesses if neither state is
+        # allowed.
+        decisions = self.guesses.decisions()
+        first = self._first()
+        second = 1 - first
+        ruled_out = self.nogoods.blocking(decisions, (rc, first))
+        if ruled_out is None:
+            self.guesses.append(rc, first)
+            self.reasons.append(None)
+            self._guessed()
+            return None
+        other = self.nogoods.blocking(decisions, (rc, second))
+        if other is None:
+            self.guesses.append(rc, second)
+            self.reasons.append(ruled_out - set([(rc, first)]))
+            self._guessed()
+            return None
+        return (ruled_out - set([(rc, first)])) | (other - set([(rc, second)]))
+
+    def _backjump(self, conflict):
+        # Returns False if there's nothing left to blame.
+        if self.stats is not None:
+            self.stats.count('backjumps')
+        conflict = set(conflict)
+        while conflict:
+            self.nogoods.add(conflict)
+            if len(self.guesses) <= self.fixed:
+                return False
+            last = self.guesses.pop()
+            if last is None:
+                return False
+            reason = self.reasons.pop()
+            if last not in conflict:
+                continue
+            conflict.discard(last)
+            rc, state = last
+            if reason is None:
+                self.guesses.append(rc, 1 - state)
+                self.reasons.append(conflict)
+                self._guessed()
+                return True
+            conflict |= reason
+        return False
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+# An exact reverser for narrow boards.
+#
+# The predecessor is built one line at a time along the board's long side,
+# so the work grows with its length rather than its area. A state is a pair
+# of consecutive lines, each an integer with one bit per cell. From each
+# state, the next line can be anything that gives every cell on the middle
+# line a history its alibi allows, and every cell on the new line one the
+# line after it could still complete. The lines beyond either end are DEAD.
+# Each layer keeps how many ways there are to reach each state, and one
+# way it was reached, so the same sweep can count every predecessor or
+# rebuild one. Since this works from the alibis, whatever propagation and
+# guesses have ruled out is already left out.
+
+import yawnoc
+
+
+def _spread(transposed):
+    # For a cell, the history bits set by the column of three cells (the
+    # line before, this line, the line after) at each offset along the line.
+    # A column is three bits, the line before highest.
+    tables = []
+    for along in (-1, 0, 1):
+        table = []
+        for column in range(8):
+            history = 0
+            for across, bit in ((-1, 4), (0, 2), (1, 1)):
+                if column & bit:
+                    dr, dc = (along, across) if transposed else (across, along)
+                    history |= 1 << (8 - (3 * (dr + 1) + (dc + 1)))
+            table.append(history)
+        tables.append(table)
+    return tables
+
+
+SPREAD = {False: _spread(False), True: _spread(True)}
+
+
+def _histories_with(bit):
+    # Every history with this bit set, as a 512-bit set.
+    return sum(1 << history for history in range(512) if history & bit)
+
+
+_WITH = [_histories_with(1 << position) for position in range(9)]
+
+
+def forget(alibi_here, bits):
+    # The alibi with the given history bits cleared in every history.
+    for position in range(9):
+        bit = 1 << position
+        if bits & bit:
+            above = _WITH[position]
+            alibi_here = (alibi_here & ~above) | ((alibi_here & above) >> bit)
+    return alibi_here
+
+
+class Strip(yawnoc.Yawnoc):
+
+    def __init__(self, automata, **kwargs):
+        super(Strip, self).__init__(automata, **kwargs)
+        # The steps for each (alibis of a line, alibis of the line after),
+        # with the next lines found so far for each pair of lines, shared by
+        # every sweep.
+        self._steps = {}
+
+    def _lines(self):
+        # Runs along whichever side is longer. Returns whether that means
+        # running along columns, and each line's alibis.
+        transposed = self.columns > self.rows
+        if transposed:
+            return transposed, [tuple(self.alibis[row][column]
+                                      for row in range(self.rows))
+                                for column in range(self.columns)]
+        return transposed, [tuple(row) for row in self.alibis]
+
+    def _steps_for(self, alibis, ahead, spread):
+        # For each position along a line, the columns that can go there,
+        # indexed by the two columns before it and the two cells of the
+        # column already known. A column can go there if it gives the cell
+        # of the line before it a history its alibi allows, and leaves the
+        # cell of the line after it one the line after that could still
+        # complete. ahead is None for the last line, after which only DEAD
+        # will do. The last step, past the end of the line, is just whether
+        # the line can end there.
+        key = (alibis, ahead)
+        if key in self._steps:
+            return self._steps[key]
+        width = len(alibis)
+        left, middle, right = spread
+        states = (0,) if ahead is None else (0, 1)
+        steps = []
+        for position in range(width + 1):
+            step = [()] * 512
+            for index in range(0, 512, 2):
+                previous, current, known = index >> 6, index >> 3 & 7, index & 7
+                if position < 2 and previous or position < 1 and current:
+                    continue
+                if position == width:
+                    columns = [0] if not known else []
+                else:
+                    columns = [known | state for state in states]
+                fits = []
+                for column in columns:
+                    if position:
+                        history = (left[previous] | middle[current] |
+                                   right[column])
+                        if not alibis[position - 1] >> history & 1:
+                            continue
+                        # Shifting a column up a line drops the line before.
+                        history = (left[previous << 1 & 7] |
+                                   middle[current << 1 & 7] |
+                                   right[column << 1 & 7])
+                        if ahead is not None and \
+                                not ahead[position - 1] >> history & 1:
+                            continue
+                    fits.append(column)
+                step[index] = tuple(fits)
+            steps.append(step)
+        self._steps[key] = steps, {}
+        return self._steps[key]
+
+    def _next_lines(self, before, line, steps, found):
+        # Every line after these two that fits, building it up one position
+        # at a time.
+        if (before, line) in found:
+            return found[before, line]
+        # Each partial line, with the columns at the last two positions.
+        partial = [(0, 0, 0)]
+        for position, step in enumerate(steps[:-1]):
+            known = ((before >> position & 1) << 2 |
+                     (line >> position & 1) << 1)
+            partial = [(after | (column & 1) << position, current, column)
+                       for after, previous, current in partial
+                       for column in step[previous << 6 | current << 3 | known]]
+        last = steps[-1]
+        fits = [after for after, previous, current in partial
+                if last[previous << 6 | current << 3]]
+        found[before, line] = fits
+        return fits
+
+    def _sweep(self, checkpoint=None):
+        # One layer per line: for each (line, next line), how many ways to
+        # get there, and the line before in one of them. checkpoint, if
+        # given, is called with no arguments for every state reached.
+        transposed, lines = self._lines()
+        spread = SPREAD[transposed]
+        width = len(lines[0]) if lines else 0
+        # The bits of a history that come from the line after it.
+        unseen = spread[0][1] | spread[1][1] | spread[2][1]
+        ahead = [tuple(forget(alibi_here, unseen) for alibi_here in alibis)
+                 for alibis in lines[1:]] + [None]
+        layers = [dict(((0, line), (1, None)) for line in range(1 << width))]
+        for alibis, alibis_ahead in zip(lines, ahead):
+            steps, found = self._steps_for(alibis, alibis_ahead, spread)
+            layer = {}
+            for (before, line), (ways, _) in layers[-1].items():
+                if checkpoint is not None:
+                    checkpoint()
+                for after in self._next_lines(before, line, steps, found):
+                    if (line, after) in layer:
+                        total, parent = layer[line, after]
+                        layer[line, after] = (total + ways, parent)
+                    else:
+                        layer[line, after] = (ways, before)
+            layers.append(layer)
+            if not layer:
+                break
+        return transposed, layers
+
+    def count(self):
+        # How many predecessors the alibis allow.
+        _, layers = self._sweep()
+        return sum(ways for ways, _ in layers[-1].values())
+
+    def predecessor(self, checkpoint=None):
+        # A predecessor the alibis allow, or None if there isn't one.
+        transposed, layers = self._sweep(checkpoint)
+        if not layers[-1]:
+            return None
+        if len(layers) == 1:
+            return [[] for _ in range(self.rows)]
+        (line, _), (_, before) = next(iter(layers[-1].items()))
+        lines = [line]
+        for layer in reversed(layers[1:-1]):
+            lines.append(before)
+            before = layer[before, lines[-2]][1]
+        lines.reverse()
+        width = self.rows if transposed else self.columns
+        cells = [[line >> position & 1 for position in range(width)]
+                 for line in lines]
+        if transposed:
+            cells = [list(row) for row in zip(*cells)]
+        return cells
+
+    def solve(self, guesses, checkpoint=None):
+        # Propagate the guesses, then fill in the rest of the board with a
+        # predecessor from the sweep. Raises ZeroDivisionError if there is
+        # no predecessor consistent with the guesses. checkpoint is as for
+        # Search.
+        for X in self.evaluate_guesses(guesses):
+            yield X
+        for X in self.adopt('strip', self.predecessor(checkpoint)):
+            yield X
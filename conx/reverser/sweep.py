@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+# Propagation over the whole board at once, with numpy.
+#
+# Every alibi is unpacked into 512 booleans, one per history. A history's
+# nine bits each get an axis of their own, so the board is an array of
+# shape 2 x ... x 2 x R x C, with one axis for each cell of the
+# neighborhood, NW first and SE last, and whole boards innermost so numpy
+# works on long runs at a time. A neighbor's view of the cells two
+# neighborhoods share is then just the histories it still allows, reduced
+# over the axes for the cells only it can see. Lined up with the same cells
+# in this neighborhood, that view is broadcast over the axes only this cell
+# can see, and every history it doesn't allow is dropped. A sweep does that
+# for every cell in every direction, and sweeps repeat until nothing
+# changes. Only the alibis that changed are packed back into integers.
+# Narrowing around a single guess stays with Yawnoc, which only visits the
+# cells nearby.
+
+import binascii
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import alibi
+import yawnoc
+
+
+def _axes(dr, dc):
+    # For a neighbor this way, the axes of its histories to reduce over,
+    # and the order to transpose its view into to line it up with ours.
+    # Axes 9 and 10 are the board's rows and columns.
+    cells = [(i, j) for i in range(3) for j in range(3)]
+    hidden = [3 * i + j for i, j in cells
+              if not (0 <= i + dr < 3 and 0 <= j + dc < 3)]
+    order = []
+    spare = list(hidden)
+    for i, j in cells:
+        if 0 <= i - dr < 3 and 0 <= j - dc < 3:
+            order.append(3 * (i - dr) + (j - dc))
+        else:
+            order.append(spare.pop())
+    return tuple(hidden), tuple(order + [9, 10])
+
+
+AXES = dict((direction, _axes(dr, dc)) for dr, dc, direction in yawnoc.NEIGHBORS)
+
+
+def unpack(alibi_here):
+    # An alibi as 512 booleans, indexed by history.
+    packed = numpy.frombuffer(binascii.unhexlify('%0128x' % alibi_here),
+                              dtype=numpy.uint8)
+    return numpy.unpackbits(packed)[::-1].astype(bool)
+
+
+def pack(histories):
+    # 512 booleans, indexed by history, as an alibi.
+    packed = numpy.packbits(histories[::-1].astype(numpy.uint8))
+    return int(binascii.hexlify(packed.tobytes()), 16)
+
+
+class Sweeper(yawnoc.Yawnoc):
+
+    def __init__(self, automata, **kwargs):
+        if numpy is None:
+            raise ImportError('Sweeper needs numpy')
+        super(Sweeper, self).__init__(automata, **kwargs)
+        # Every sweep made so far.
+        self.sweeps = 0
+
+    def _sweep(self, board):
+        # Corroborate every cell once in each direction.
+        rows, columns = self.rows, self.columns
+        for dr, dc, direction in yawnoc.NEIGHBORS:
+            hidden, order = AXES[direction]
+            # The cells that have a neighbor this way, and those neighbors.
+            here = board[..., max(0, -dr):rows - max(0, dr),
+                         max(0, -dc):columns - max(0, dc)]
+            there = board[..., max(0, dr):rows - max(0, -dr),
+                          max(0, dc):columns - max(0, -dc)]
+            if not here.size:
+                continue
+            view = there.any(axis=hidden, keepdims=True).transpose(order)
+            numpy.logical_and(here, view, out=here)
+
+    def corroborate(self, remaining=None):
+        # Revise the whole board until nothing changes, or just the given
+        # cells the way Yawnoc does. So does the whole board while it's tied
+        # to symmetries, as sweeps don't hold cells to their images.
+        if remaining is not None or self._ties:
+            for X in super(Sweeper, self).corroborate(remaining):
+                yield X
+            return
+        started = time.time()
+        before = numpy.array([[unpack(a) for a in row] for row in self.alibis],
+                             dtype=bool).reshape(self.rows, self.columns, 512)
+        board = numpy.ascontiguousarray(before.transpose(2, 0, 1))
+        histories = board.reshape((2,) * 9 + (self.rows, self.columns))
+        sweeps = 0
+        left = None
+        while left != board.sum():
+            left = board.sum()
+            self._sweep(histories)
+            sweeps += 1
+        board = board.transpose(1, 2, 0)
+        self.sweeps += sweeps
+        revised = self.rows * self.columns * sweeps
+        self.revisions += revised
+        # Without tracking which guesses each sweep relied on, every open
+        # decision level is to blame for what changed.
+        blame = (1 << len(self._levels)) - 1
+        updates = []
+        for row, column in numpy.argwhere((board != before).any(axis=2)):
+            row, column = int(row), int(column)
+            alibi_here = pack(board[row, column])
+            self._set(row, column, alibi_here,
+                      self._blame[row][column] | blame)
+            updates.append((row, column, alibi_here))
+        empty = numpy.argwhere(~board.any(axis=2))
+        if self.stats is not None:
+            self.stats.count('revisions', revised)
+            self.stats.add_time('corroborate', time.time() - started)
+        if len(empty):
+            row, column = int(empty[0][0]), int(empty[0][1])
+            self.impossible = True
+            self.conflict = self.blamed(row, column)
+            if self.stats is not None:
+                self.stats.count('contradictions')
+            raise ZeroDivisionError()
+        for row, column, alibi_here in updates:
+            yield ((row, column), self.detective.was_alive(alibi_here),
+                   alibi.size(alibi_here))
+        self.save()
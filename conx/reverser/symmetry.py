@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+# The eight symmetries of the square, for boards and for alibis.
+#
+# A symmetry is (transpose, flip rows, flip columns), applied in that
+# order, and is named by its index in SYMMETRIES; 0 leaves everything
+# where it is. Turning an alibi moves every history in it the same way, so
+# if a predecessor has a symmetry, the alibi of a cell's image is the
+# cell's own alibi turned.
+
+import alibi
+
+SYMMETRIES = [(transpose, flip_rows, flip_columns)
+              for transpose in (False, True)
+              for flip_rows in (False, True)
+              for flip_columns in (False, True)]
+
+
+def place(index, row, column, rows, columns):
+    # Where a cell of a rows x columns region goes under a symmetry.
+    transpose, flip_rows, flip_columns = SYMMETRIES[index]
+    if transpose:
+        row, column, rows, columns = column, row, columns, rows
+    if flip_rows:
+        row = rows - 1 - row
+    if flip_columns:
+        column = columns - 1 - column
+    return row, column
+
+
+def _moves(index):
+    # Where each history goes under a symmetry.
+    moves = []
+    for history in range(512):
+        moved = 0
+        for bit in range(9):
+            if history >> (8 - bit) & 1:
+                row, column = place(index, bit // 3, bit % 3, 3, 3)
+                moved |= 1 << (8 - (3 * row + column))
+        moves.append(moved)
+    return moves
+
+
+MOVES = [_moves(index) for index in range(len(SYMMETRIES))]
+
+# The symmetry that undoes each one.
+INVERSE = [[j for j in range(len(SYMMETRIES))
+            if all(MOVES[j][MOVES[i][h]] == h for h in range(512))][0]
+           for i in range(len(SYMMETRIES))]
+
+# Alibis already turned, by (symmetry, alibi).
+_turned = {}
+
+
+def turn(index, alibi_here):
+    # An alibi with every history moved by a symmetry.
+    if (index, alibi_here) not in _turned:
+        if len(_turned) > 100000:
+            _turned.clear()
+        moves = MOVES[index]
+        _turned[index, alibi_here] = alibi.from_histories(
+            moves[history] for history in alibi.histories(alibi_here))
+    return _turned[index, alibi_here]
+
+
+def _keeps(index, cells, rows, columns):
+    for row in range(rows):
+        for column in range(columns):
+            image_row, image_column = place(index, row, column, rows, columns)
+            if cells[image_row][image_column] != cells[row][column]:
+                return False
+    return True
+
+
+def of(cells):
+    # The symmetries, other than leaving it be, that map a board to itself.
+    if hasattr(cells, 'tolist'):
+        cells = cells.tolist()
+    rows = len(cells)
+    columns = len(cells[0]) if rows else 0
+    found = []
+    for index, (transpose, _, _) in enumerate(SYMMETRIES):
+        if not index or transpose and rows != columns:
+            continue
+        if _keeps(index, cells, rows, columns):
+            found.append(index)
+    return found
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+
+# Reversal of large boards, split into tiles across a pool of processes.
+#
+# The board is cut into tiles. Each tile owns a core, and works on that
+# core plus a halo of its neighbors' cells. Workers are handed plain data
+# (target cells and alibis) and hand plain data back.
+#
+# First every tile propagates on its own, and the alibis of cells that
+# tiles share are intersected, over and over until they all agree.
+#
+# Then tiles are solved in four rounds by the parity of their position, so
+# no two tiles in a round touch. Each tile keeps the cells fixed by earlier
+# rounds and fixes its own core. A tile solved later covers every target
+# cell on the seams it shares with tiles solved earlier, so the stitched
+# cores agree. Before a tile settles on a solution, it checks that fixing
+# its core doesn't contradict anything within another halo's width, and
+# tries its next solution if it does.
+#
+# That can still rule out a solution further away, so the main process
+# keeps the whole board, and fixes each core on it as a decision level of
+# its own, propagating as far as the change goes. A tile that can't be
+# fixed is solved once more against the board as it now stands, keeping
+# every tile that already fits. Only if that fails is the whole board
+# searched in one process instead. On dense boards it often does, after
+# costing more than that search would alone. Either way the answer is
+# checked with Conway.step.
+
+import itertools
+import multiprocessing
+
+import search
+import yawnoc
+from conx.automata import conway
+
+
+def _reverser(job):
+    cells, rule, alibis = job
+    automata = conway.Conway(cells)
+    automata.rule = rule
+    reverser = yawnoc.Yawnoc(automata, dead_border=False)
+    for row, alibi_row in enumerate(alibis):
+        for column, alibi_there in enumerate(alibi_row):
+            reverser.restrict(row, column, alibi_there)
+    return reverser
+
+
+def propagate_tile(job):
+    # A tile's alibis once propagation settles, or None if it can't.
+    reverser = _reverser(job)
+    try:
+        for _ in reverser.corroborate():
+            pass
+    except ZeroDivisionError:
+        return None
+    return reverser.alibis
+
+
+# How many of a tile's solutions to check before giving up on it.
+TRIES = 16
+
+
+def _crop(rows, box):
+    top, left, bottom, right = box
+    return [row[left:right] for row in rows[top:bottom]]
+
+
+def solve_tile(job):
+    # A predecessor of a tile's region whose core fits with everything
+    # around it, or None. The job covers a wider area than the region, and
+    # gives the region and core boxes within it.
+    cells, rule, alibis, region, core = job
+    checker = _reverser((cells, rule, alibis))
+    try:
+        for _ in checker.corroborate():
+            pass
+    except ZeroDivisionError:
+        return None
+    solver = _reverser((_crop(cells, region), rule, _crop(alibis, region)))
+    solutions = search.Search(solver).solutions()
+    top, left, bottom, right = core
+    nearby = [(row, column)
+              for row in range(top - 1, bottom + 1)
+              for column in range(left - 1, right + 1)]
+    for predecessor in itertools.islice(solutions, TRIES):
+        checker.push(('tile', None))
+        for row in range(top, bottom):
+            for column in range(left, right):
+                state = predecessor[row - region[0]][column - region[1]]
+                checker.narrow(row, column, c=state)
+        try:
+            for _ in checker.corroborate(nearby):
+                pass
+        except ZeroDivisionError:
+            checker.pop()
+            continue
+        return predecessor
+    return None
+
+
+class Tiler(object):
+
+    def __init__(self, automata, tile=32, halo=4, processes=None,
+                 reverser_class=yawnoc.Yawnoc):
+        self.automata = automata
+        self.tile = tile
+        self.processes = processes
+        self.reverser_class = reverser_class
+        self.rows = automata.rows
+        self.columns = automata.columns
+        self.rounds = 0
+        self.stitches = 0
+        self.repairs = 0
+        self.fell_back = False
+        self.cut(halo)
+
+    def cut(self, halo):
+        # Each tile is ((row, column) in tiles, core box, region box), where
+        # a box is (top, left, bottom, right), bottom and right exclusive.
+        self.halo = max(1, halo)
+        self.tiles = []
+        for ti, top in enumerate(range(0, self.rows, self.tile)):
+            for tj, left in enumerate(range(0, self.columns, self.tile)):
+                core = (top, left, min(top + self.tile, self.rows),
+                        min(left + self.tile, self.columns))
+                region = (max(0, core[0] - self.halo), max(0, core[1] - self.halo),
+                          min(self.rows, core[2] + self.halo),
+                          min(self.columns, core[3] + self.halo))
+                self.tiles.append(((ti, tj), core, region))
+
+    def _job(self, alibis, region):
+        return (_crop(self.automata.cells, region), self.automata.rule,
+                _crop(alibis, region))
+
+    def _solve_job(self, alibis, core, region):
+        # The area a tile checks its solutions against, one more halo out,
+        # with its region and core boxes relative to that.
+        top, left, bottom, right = core
+        halo = 2 * self.halo
+        area = (max(0, top - halo), max(0, left - halo),
+                min(self.rows, bottom + halo), min(self.columns, right + halo))
+        shift = lambda box: (box[0] - area[0], box[1] - area[1],
+                             box[2] - area[0], box[3] - area[1])
+        return self._job(alibis, area) + (shift(region), shift(core))
+
+    def _map(self, pool, function, jobs):
+        if pool is None:
+            return [function(job) for job in jobs]
+        return pool.map(function, jobs)
+
+    def _settle(self, pool, alibis):
+        # Propagate every tile until the shared cells agree. Returns False
+        # if some tile runs into a contradiction.
+        while True:
+            self.rounds += 1
+            results = self._map(pool, propagate_tile,
+                                [self._job(alibis, region)
+                                 for _, _, region in self.tiles])
+            changed = False
+            for (_, _, (top, left, _, _)), result in zip(self.tiles, results):
+                if result is None:
+                    return False
+                for r, alibi_row in enumerate(result):
+                    for c, alibi_there in enumerate(alibi_row):
+                        merged = alibis[top + r][left + c] & alibi_there
+                        if merged != alibis[top + r][left + c]:
+                            alibis[top + r][left + c] = merged
+                            changed = True
+            if not changed:
+                return True
+
+    def _verify(self, cells):
+        board = conway.ArrayConway if conway.numpy else conway.Conway
+        predecessor = board(cells)
+        predecessor.rule = self.automata.rule
+        predecessor.step()
+        return predecessor.cells == [list(row) for row in self.automata.cells]
+
+    def _fall_back(self, alibis):
+        self.fell_back = True
+        reverser = self.reverser_class(self.automata)
+        for row, alibi_row in enumerate(alibis):
+            for column, alibi_there in enumerate(alibi_row):
+                reverser.restrict(row, column, alibi_there)
+        if search.Search(reverser).solve():
+            return reverser.bestguess()
+        return None
+
+    def _board(self, alibis):
+        # The whole board, held to the alibis, or None if they contradict.
+        board = self.reverser_class(self.automata)
+        for row, alibi_row in enumerate(alibis):
+            for column, alibi_there in enumerate(alibi_row):
+                board.restrict(row, column, alibi_there)
+        try:
+            for _ in board.corroborate():
+                pass
+        except ZeroDivisionError:
+            return None
+        return board
+
+    def _fix(self, board, core, region, cells):
+        # Fix a tile's core on the board as one decision level. Returns
+        # False, leaving the board as it was, if that contradicts anything.
+        top, left, bottom, right = core
+        board.push(('tile', core))
+        changed = []
+        for row in range(top, bottom):
+            for column in range(left, right):
+                board.narrow(row, column,
+                             c=cells[row - region[0]][column - region[1]])
+                changed.append((row, column))
+        try:
+            for _ in board.corroborate(changed):
+                pass
+        except ZeroDivisionError:
+            board.pop()
+            return False
+        return True
+
+    def _repair(self, board, core, region):
+        # Solve a tile that couldn't be fixed again, against the board as
+        # it now stands, and fix it. Returns whether that worked.
+        cells = solve_tile(self._solve_job(board.alibis, core, region))
+        if cells is None or not self._fix(board, core, region, cells):
+            return False
+        self.repairs += 1
+        return True
+
+    def _stitch(self, pool, alibis):
+        # Solve the tiles round by round. Returns the stitched predecessor,
+        # or None if some tile couldn't be solved.
+        self.stitches += 1
+        board = self._board(alibis)
+        if board is None:
+            return None
+        for parity in ((0, 0), (0, 1), (1, 0), (1, 1)):
+            batch = [(core, region) for (ti, tj), core, region in self.tiles
+                     if (ti % 2, tj % 2) == parity]
+            results = self._map(pool, solve_tile,
+                                [self._solve_job(board.alibis, core, region)
+                                 for core, region in batch])
+            failed = [(core, region)
+                      for (core, region), cells in zip(batch, results)
+                      if cells is None or
+                      not self._fix(board, core, region, cells)]
+            for core, region in failed:
+                if not self._repair(board, core, region):
+                    return None
+        return board.bestguess()
+
+    def solve(self):
+        # A predecessor of the whole board, or None if there isn't one.
+        whole = self.reverser_class(self.automata)
+        alibis = [row[:] for row in whole.alibis]
+        pool = None
+        if self.processes != 1 and len(self.tiles) > 1:
+            pool = multiprocessing.Pool(self.processes)
+        try:
+            if not self._settle(pool, alibis):
+                return None
+            if len(self.tiles) > 1:
+                fixed = self._stitch(pool, alibis)
+                if fixed is not None and self._verify(fixed):
+                    return fixed
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return self._fall_back(alibis)
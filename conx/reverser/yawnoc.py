@@ -1,32 +1,85 @@
 #!/usr/bin/env python
 
+import time
+
+import agenda
 import alibi
+import heuristic
+import symmetry
 
 
 DEAD = 0
 ALIVE = 1
 
+# Where each neighbor lies, relative to a cell.
+NEIGHBORS = [(-1, -1, 'NW'), (-1, 0, 'N'), (-1, 1, 'NE'),
+             ( 0, -1, 'W'),                ( 0, 1, 'E'),
+             ( 1, -1, 'SW'), ( 1, 0, 'S'), ( 1, 1, 'SE')]
 
-class Yawnoc(object):
 
-    def __init__(self, automata):
-        self.detective = alibi.Detective(automata.rule)
+class Yawnoc(object):
 
-        self.alibis = [[self.detective.narrow(range(512), Z=cell)
-                        for cell in row]
-                       for row in automata.cells]
+    def __init__(self, automata, smallest_first=False, branching='ambiguous',
+                 dead_border=True, stats=None):
+        # branching names one of heuristic.HEURISTICS, or is a Heuristic class.
+        # Without dead_border, nothing is assumed about what lies beyond the
+        # edges, as for a piece cut out of a larger board. stats, if given,
+        # is a conx.common.stats.Stats to count into.
+        started = time.time()
+        self.stats = stats
+        self.detective = alibi.Detective(automata.rule, stats)
+        self.smallest_first = smallest_first
+        self.branching = heuristic.HEURISTICS.get(branching, branching)(self)
+        self.revisions = 0
+
+        cells = automata.cells
+        if hasattr(cells, 'tolist'):
+            cells = cells.tolist()
+        rows = len(cells)
+        columns = len(cells[0]) if rows else 0
+        # Each cell starts from a template for what it became and which
+        # edges of the board it lies against.
+        across = [0] * columns
+        down = [0] * rows
+        if dead_border and rows and columns:
+            across[0] |= alibi.LEFT
+            across[-1] |= alibi.RIGHT
+            down[0] |= alibi.TOP
+            down[-1] |= alibi.BOTTOM
+        starts = {}
+        for value in (DEAD, ALIVE):
+            for border in set(d | a for d in set(down) for a in set(across)):
+                starts[value, border] = self.detective.start(value, border)
+        self.alibis = [[starts[cell, edges | border]
+                        for cell, border in zip(row, across)]
+                       for row, edges in zip(cells, down)]
+        if stats is not None:
+            stats.resize(sum(alibi.size(a) for row in self.alibis for a in row))
 
         self.impossible = False
-
-        for row in range(self.rows):
-            self.narrow(row, 0, nw=DEAD, w=DEAD, sw=DEAD)
-            self.narrow(row, self.columns - 1, ne=DEAD, e=DEAD, se=DEAD)
-
-        for column in range(self.columns):
-            self.narrow(0, column, nw=DEAD, n=DEAD, ne=DEAD)
-            self.narrow(self.rows - 1, column, sw=DEAD, s=DEAD, se=DEAD)
-
-        self._original = None
+        # Whether the last level was left before it finished propagating,
+        # by a caller that stopped reading evaluate_guesses partway.
+        self._halfway = False
+
+        # The symmetries the target has, and those every predecessor is
+        # held to; see tie().
+        self.symmetries = symmetry.of(cells)
+        self._ties = []
+        self._untied = None
+
+        # Every change to an alibi made under a decision level is recorded
+        # on the trail as (row, column, old alibi, old blame), so it can be
+        # undone. A cell's blame is a bitmask of the decision levels its
+        # alibi depends on.
+        self.decisions = []
+        self.conflict = []
+        self._levels = []
+        self._trail = []
+        self._blame = [[0] * columns for _ in range(rows)]
+        self._settled = False
+
+        if stats is not None:
+            stats.add_time('init', time.time() - started)
 
     def __str__(self):
         rows = []
@@ -60,7 +113,7 @@ class Yawnoc(object):
 
     @property
     def cloud(self):
-        return [[(self.detective.was_alive(a), len(a))
+        return [[(self.detective.was_alive(a), alibi.size(a))
                  for a in row]
                 for row in self.alibis]
 
@@ -86,6 +139,12 @@ class Yawnoc(object):
                 for r in (-1, 0, 1)
                 for c in (-1, 0, 1)]
 
+    def neighbors(self, row, column):
+        # The on-board neighbors of a cell, and which direction each lies in.
+        return [((row + dr, column + dc), direction)
+                for dr, dc, direction in NEIGHBORS
+                if 0 <= row + dr < self.rows and 0 <= column + dc < self.columns]
+
     def neighborhood(self, row, column):
         return [self.alibi_at(r, c)
                 for (r, c) in self.neighborhood_coords(row, column)]
@@ -95,69 +154,288 @@ class Yawnoc(object):
         if alibi_here:
             return self.detective.was_alive(alibi_here)
 
+    def length_at(self, row, column):
+        alibi_here = self.alibi_at(row, column)
+        if alibi_here is not None:
+            return alibi.size(alibi_here)
+
     def narrow(self, row, column, **criteria):
         alibi_here = self.alibi_at(row, column)
         if alibi_here:
-            alibi_here = self.detective.narrow(alibi_here, **criteria)
+            blame = self._blame[row][column]
+            if self._levels:
+                blame |= 1 << (len(self._levels) - 1)
+            self._set(row, column, self.detective.narrow(alibi_here, **criteria), blame)
+
+    def restrict(self, row, column, alibi_there):
+        # Rule out every history not in another alibi for the same cell.
+        alibi_here = self.alibi_at(row, column)
+        if alibi_here is not None and alibi_here & alibi_there != alibi_here:
+            blame = self._blame[row][column]
+            if self._levels:
+                blame |= 1 << (len(self._levels) - 1)
+            self._set(row, column, alibi_here & alibi_there, blame)
+
+    def _set(self, row, column, alibi_here, blame):
+        if self._levels:
+            self._trail.append((row, column, self.alibis[row][column],
+                                self._blame[row][column]))
+        if self.stats is not None:
+            change = alibi.size(alibi_here) - alibi.size(self.alibis[row][column])
+            self.stats.resize(change)
+            if change < 0:
+                self.stats.count('eliminated', -change)
+        self.alibis[row][column] = alibi_here
+        self._blame[row][column] = blame
+        self.branching.update(row, column)
+
+    def blamed(self, row, column):
+        # The decisions that a cell's alibi depends on.
+        blame = self._blame[row][column]
+        return [decision for level, decision in enumerate(self.decisions)
+                if blame >> level & 1]
+
+    def push(self, decision):
+        # Open a new decision level. Everything changed from here on can be
+        # undone with pop().
+        self.decisions.append(decision)
+        self._levels.append(len(self._trail))
+
+    def pop(self):
+        # Undo everything changed since the last push().
+        # Returns the coordinates of every restored cell.
+        restored = set()
+        if not self._levels:
+            return restored
+        self.decisions.pop()
+        mark = self._levels.pop()
+        while len(self._trail) > mark:
+            row, column, alibi_here, blame = self._trail.pop()
+            if self.stats is not None:
+                self.stats.resize(alibi.size(alibi_here) -
+                                  alibi.size(self.alibis[row][column]))
             self.alibis[row][column] = alibi_here
+            self._blame[row][column] = blame
+            restored.add((row, column))
+        for row, column in restored:
+            self.branching.update(row, column)
+        self.impossible = False
+        return restored
+
+    def _size_at(self, row, column):
+        return alibi.size(self.alibis[row][column])
+
+    def images(self, row, column):
+        # Where the symmetries tied to send a cell, other than back to itself.
+        images = []
+        for index in self._ties:
+            image = symmetry.place(index, row, column, self.rows, self.columns)
+            if image != (row, column):
+                images.append((index, image))
+        return images
+
+    def tie(self, symmetries):
+        # From here on, only predecessors with these symmetries: each cell's
+        # alibi is held to its images', turned. Any guesses are undone, and
+        # untie() puts the board back as it was.
+        self.reset()
+        if self._untied is None:
+            self._untied = ([row[:] for row in self.alibis],
+                            [row[:] for row in self._blame], self._settled)
+        self._ties = list(symmetries)
+        self._settled = False
+
+    def untie(self):
+        self.reset()
+        if self._untied is None:
+            return
+        alibis, blame, self._settled = self._untied
+        if self.stats is not None:
+            self.stats.resize(sum(alibi.size(a) for row in alibis for a in row) -
+                              sum(alibi.size(a) for row in self.alibis for a in row))
+        self.alibis = alibis
+        self._blame = blame
+        self._ties = []
+        self._untied = None
+        self.branching.rebuild()
 
     def corroborate(self, remaining=None):
+        # Revise cells against their neighbors until nothing changes.
+        # self.revisions counts every cell revised along the way. With stats,
+        # the time spent here, but not in whoever takes the changes, is
+        # counted as the corroborate phase.
+        settling = remaining is None
         if remaining is None:
             remaining = [(row, column)
                          for row in range(self.rows)
                          for column in range(self.columns)]
-        while remaining:
-            row, column = remaining.pop(0)
-            alibi_here = self.alibi_at(row, column)
-            if alibi_here is None:
-                continue
+        key = self._size_at if self.smallest_first else None
+        queue = agenda.Agenda(self.rows, self.columns, key=key)
+        queue.extend(remaining)
+        if self._ties and not settling:
+            for row, column in list(remaining):
+                queue.extend(image for _, image in self.images(row, column))
+        timing = self.stats is not None
+        started = time.time() if timing else None
+        try:
+            for X in self._corroborate(queue):
+                if timing:
+                    self.stats.add_time('corroborate', time.time() - started)
+                    started = None
+                yield X
+                if timing:
+                    started = time.time()
+        finally:
+            if started is not None:
+                self.stats.add_time('corroborate', time.time() - started)
+        if settling:
+            self.save()
+
+    def _corroborate(self, queue):
+        while queue:
+            row, column = queue.pop()
+            alibi_here = self.alibis[row][column]
             if not alibi_here:
-                self.impossible = True
-                raise ZeroDivisionError()
-            old_alibi_length = len(alibi_here)
-            directions = ['NW', 'N', 'NE', 'W', None, 'E', 'SW', 'S', 'SE']
-            for ((nrow, ncol), direction) in zip(self.neighborhood_coords(row, column),
-                                                 directions):
-                if direction is None:
-                    continue
-                neighbor = self.alibi_at(nrow, ncol)
-                if neighbor is None:
-                    continue
-                alibi_here = self.detective.corroborate(alibi_here, neighbor, direction)
-            if old_alibi_length > len(alibi_here):
-                neighbors = [(row + dr, column + dc)
-                             for dc in (-1, 0, 1)
-                             for dr in (-1, 0, 1)]
-                remaining.extend(neighbors)
-                self.alibis[row][column] = alibi_here
+                self._contradiction(row, column)
+            self.revisions += 1
+            if self.stats is not None:
+                self.stats.count('revisions')
+            old_alibi = alibi_here
+            blame = self._blame[row][column]
+            neighbors = self.neighbors(row, column)
+            for (nrow, ncol), direction in neighbors:
+                neighbor = self.alibis[nrow][ncol]
+                narrowed = self.detective.corroborate(alibi_here, neighbor, direction)
+                if narrowed != alibi_here:
+                    blame |= self._blame[nrow][ncol]
+                    alibi_here = narrowed
+            images = self.images(row, column)
+            for index, (irow, icol) in images:
+                narrowed = alibi_here & symmetry.turn(symmetry.INVERSE[index],
+                                                      self.alibis[irow][icol])
+                if narrowed != alibi_here:
+                    blame |= self._blame[irow][icol]
+                    alibi_here = narrowed
+            if alibi_here != old_alibi:
+                self._set(row, column, alibi_here, blame)
+                if not alibi_here:
+                    # Don't wait for it to come off the queue again; it
+                    # might not.
+                    self._contradiction(row, column)
+                for (nrow, ncol), _ in neighbors:
+                    queue.add(nrow, ncol)
+                for _, (irow, icol) in images:
+                    queue.add(irow, icol)
                 was_alive = self.detective.was_alive(alibi_here)
-                yield (row, column), was_alive, len(alibi_here)
-        self.save()
-
-    def next_guessable(self):
-        for W in range(50):
-            waterline = W / 100.0
-            for r in range(self.rows):
-                for c in range(self.columns):
-                    if abs(0.5 - self.alive_at(r, c)) <= waterline:
-                        return r, c
+                yield (row, column), was_alive, alibi.size(alibi_here)
+
+    def _contradiction(self, row, column):
+        # Any of the decisions this cell depends on could be wrong.
+        self.impossible = True
+        self.conflict = self.blamed(row, column)
+        if self.stats is not None:
+            self.stats.count('contradictions')
+        raise ZeroDivisionError()
+
+    def next_guessable(self, cells=None):
+        return self.branching.best(cells)
+
+    def components(self):
+        # The undecided cells, in groups no alibi spans: cells three or more
+        # apart share no neighborhood, so each group can be searched, or
+        # counted, on its own. Each group is sorted, and the groups are in
+        # order of their first cell.
+        undecided = set((row, column)
+                        for row in range(self.rows)
+                        for column in range(self.columns)
+                        if heuristic.undecided(self.alibis[row][column])
+                        is not None)
+        groups = []
+        for start in sorted(undecided):
+            if start not in undecided:
+                continue
+            undecided.remove(start)
+            group = [start]
+            frontier = [start]
+            while frontier:
+                row, column = frontier.pop()
+                # Cells tied by symmetry go together too.
+                near = [image for _, image in self.images(row, column)]
+                near.extend((row + dr, column + dc)
+                            for dr in range(-2, 3) for dc in range(-2, 3))
+                for rc in near:
+                    if rc in undecided:
+                        undecided.remove(rc)
+                        group.append(rc)
+                        frontier.append(rc)
+            groups.append(sorted(group))
+        return groups
 
     def evaluate_guesses(self, guesses):
-        self.reset()
-        for (row, column), state in guesses.as_dict().items():
+        # Bring the board in line with the guesses, undoing only the levels
+        # that no longer match and propagating only the new guesses.
+        wanted = guesses.decisions()
+        keep = 0
+        while (keep < len(self.decisions) and keep < len(wanted) and
+               self.decisions[keep] == wanted[keep]):
+            keep += 1
+        if self.impossible or self._halfway:
+            # The last level never finished propagating; redo it.
+            keep = max(0, min(keep, len(self.decisions) - 1))
+        self.impossible = False
+        self._halfway = False
+
+        restored = set()
+        while len(self.decisions) > keep:
+            restored |= self.pop()
+        for row, column in sorted(restored):
+            yield (row, column), self.alive_at(row, column), self.length_at(row, column)
+
+        if not self._settled:
+            for X in self.corroborate():
+                yield X
+
+        for (row, column), state in wanted[keep:]:
+            self.push(((row, column), state))
+            self._halfway = True
             self.narrow(row, column, c=state)
+            yield (row, column), self.alive_at(row, column), self.length_at(row, column)
+            for X in self.corroborate(self.neighborhood_coords(row, column)):
+                yield X
+            self._halfway = False
+
+    def adopt(self, label, cells):
+        # Take a whole predecessor, found some other way, as one more
+        # decision level, (label, None), so that the next change to the
+        # guesses undoes it, and yield the cells it changes. cells of None
+        # means there was no predecessor: raises ZeroDivisionError, with
+        # every decision to blame.
+        if cells is None:
+            self.impossible = True
+            self.conflict = self.decisions[:]
+            raise ZeroDivisionError()
+        self.push((label, None))
+        for row in range(self.rows):
+            for column in range(self.columns):
+                alibi_here = self.alibis[row][column]
+                self.narrow(row, column, c=cells[row][column])
+                if self.alibis[row][column] != alibi_here:
+                    yield ((row, column), self.alive_at(row, column),
+                           self.length_at(row, column))
         for X in self.corroborate():
             yield X
 
     def save(self):
-        if self._original is None:
-            self._original = [[c[:] for c in row] for row in self.alibis]
+        # Propagation has settled before any guesses were made. This is the
+        # state reset() returns to.
+        if not self.decisions:
+            self._settled = True
 
     def reset(self):
-        if self._original is not None:
-            self.alibis = [[c[:] for c in row] for row in self._original]
+        while self.decisions:
+            self.pop()
         self.impossible = False
-
+        self._halfway = False
 
 if __name__ == '__main__':
     import argparse
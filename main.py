@@ -1,16 +1,28 @@
 #!/usr/bin/env python
 
 import argparse
+import functools
+import multiprocessing
 import random
+import sys
 
 from conx.interface import interface
 from conx.automata import conway
+from conx.automata import rules
+from conx.common.stats import Stats
+from conx.reverser import cnf
+from conx.reverser import heuristic
+from conx.reverser import oracle
+from conx.reverser import patterns
+from conx.reverser import strip
+from conx.reverser import sweep
+from conx.reverser import tiles
 from conx.reverser import yawnoc
 
 coin = lambda p: p >= random.random()
 
-def randomdata(X):
-    return [[coin(0.333) for c in range(X)]
+def randomdata(X, density=0.333):
+    return [[coin(density) for c in range(X)]
              for r in range(X)]
 
 if __name__ == '__main__':
@@ -18,16 +30,76 @@ if __name__ == '__main__':
     ap.add_argument('--size', type=int, default=10)
     ap.add_argument('--load', type=str)
     ap.add_argument('--auto', dest='auto', action='store_true')
+    ap.add_argument('--sat', dest='sat', action='store_true')
+    ap.add_argument('--sat-command', type=str)
+    ap.add_argument('--sweep', dest='sweep', action='store_true')
+    ap.add_argument('--strip', dest='strip', action='store_true')
+    ap.add_argument('--branching', choices=sorted(heuristic.HEURISTICS),
+                    default='ambiguous')
+    ap.add_argument('--tile', type=int)
+    ap.add_argument('--processes', type=int)
+    ap.add_argument('--portfolio', dest='portfolio', action='store_true')
+    ap.add_argument('--stats', type=str)
+    ap.add_argument('--fps', type=int, default=30)
+    ap.add_argument('--rule', type=str)
+    ap.add_argument('--cache', type=str)
     args = ap.parse_args()
     C = None
     if args.load:
         C = conway.Conway.load(args.load)
+        if args.rule:
+            C.rule = args.rule
     else:
-        C = conway.Conway(randomdata(args.size))
+        C = conway.Conway(randomdata(args.size), args.rule or rules.LIFE)
         C.step()
 
-    I = interface.Interface(C, yawnoc.Yawnoc)
-    if args.auto:
-        I.autorun()
+    stats = Stats() if args.stats else None
+    reverser_class = functools.partial(yawnoc.Yawnoc, branching=args.branching,
+                                       stats=stats)
+    if args.sweep:
+        reverser_class = functools.partial(sweep.Sweeper,
+                                           branching=args.branching,
+                                           stats=stats)
+    if args.strip:
+        reverser_class = functools.partial(strip.Strip,
+                                           branching=args.branching,
+                                           stats=stats)
+    if args.sat or args.sat_command:
+        solver = cnf.Solver
+        if args.sat_command:
+            solver = functools.partial(cnf.External, args.sat_command.split())
+        reverser_class = functools.partial(oracle.Oracle, solver=solver,
+                                           branching=args.branching,
+                                           stats=stats)
+
+    if args.tile:
+        T = tiles.Tiler(C, tile=args.tile, processes=args.processes,
+                        reverser_class=reverser_class)
+        cells = T.solve()
+        if T.fell_back:
+            print >> sys.stderr, ("The tiles didn't fit together, so the whole "
+                                  "board was searched instead. --tile mostly "
+                                  "helps on sparse boards.")
+        if cells is None:
+            print "Impossible!"
+        else:
+            C.save('original.gol')
+            conway.Conway(cells).save('solution.gol')
     else:
-        I.run()
+        portfolio = None
+        if args.portfolio:
+            portfolio = args.processes or multiprocessing.cpu_count()
+        cache = None
+        if args.cache:
+            cache = patterns.PatternCache(args.cache)
+        I = interface.Interface(C, reverser_class, portfolio, args.fps, cache)
+        try:
+            if args.auto:
+                I.autorun()
+            else:
+                I.run()
+        finally:
+            if cache is not None:
+                cache.close()
+    if stats is not None:
+        stats.dump(args.stats)
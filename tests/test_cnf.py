@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+import itertools
+import random
+import unittest
+
+from conx.automata import conway
+from conx.reverser import cnf
+from conx.reverser import oracle
+from conx.reverser import yawnoc
+from conx.reverser.search import Guesses, Search
+
+
+def satisfies(model, clauses):
+    return all(any(model[abs(lit)] == (lit > 0) for lit in clause)
+               for clause in clauses)
+
+
+def enumerate_models(variables, clauses):
+    # Every assignment that satisfies the clauses, the slow way.
+    for values in itertools.product((False, True), repeat=variables):
+        model = [False] + list(values)
+        if satisfies(model, clauses):
+            yield model
+
+
+def formula(variables, clauses):
+    solver = cnf.Solver(variables)
+    for clause in clauses:
+        solver.add_clause(clause)
+    return solver
+
+
+class SolverTest(unittest.TestCase):
+
+    def test_random_formulas(self):
+        # Around the threshold of 3-SAT, so both answers come up.
+        rnd = random.Random(0)
+        answers = set()
+        for _ in range(200):
+            variables = rnd.randint(1, 8)
+            clauses = [[rnd.choice((-1, 1)) * rnd.randint(1, variables)
+                        for _ in range(rnd.randint(1, 3))]
+                       for _ in range(rnd.randint(1, 5 * variables))]
+            expected = next(enumerate_models(variables, clauses), None)
+            model = formula(variables, clauses).solve()
+            answers.add(model is not None)
+            self.assertEqual(model is None, expected is None, clauses)
+            if model is not None:
+                self.assertTrue(satisfies(model, clauses), clauses)
+        self.assertEqual(answers, set([False, True]))
+
+    def test_pigeonhole(self):
+        # Pigeon p in hole h is variable p * holes + h + 1. One more pigeon
+        # than holes can't fit, which takes the solver some conflicts to
+        # learn; exactly as many can.
+        for pigeons, holes in ((6, 5), (5, 5)):
+            def var(p, h):
+                return p * holes + h + 1
+            clauses = [[var(p, h) for h in range(holes)]
+                       for p in range(pigeons)]
+            for h in range(holes):
+                for p, q in itertools.combinations(range(pigeons), 2):
+                    clauses.append([-var(p, h), -var(q, h)])
+            solver = formula(pigeons * holes, clauses)
+            model = solver.solve()
+            if pigeons > holes:
+                self.assertIsNone(model)
+                self.assertGreater(solver.conflicts, 0)
+            else:
+                self.assertTrue(satisfies(model, clauses))
+
+
+class OracleTest(unittest.TestCase):
+
+    def test_agrees_with_search(self):
+        # Random targets, some stepped so they have a predecessor, some not.
+        rnd = random.Random(1)
+        answers = set()
+        for trial in range(12):
+            size = rnd.randint(3, 6)
+            cells = [[int(rnd.random() < 0.4) for _ in range(size)]
+                     for _ in range(size)]
+            target = conway.Conway(cells)
+            if trial % 2:
+                target.step()
+            reverser = oracle.Oracle(target)
+            try:
+                for _ in reverser.solve(Guesses()):
+                    pass
+                found = True
+            except ZeroDivisionError:
+                found = False
+            answers.add(found)
+            self.assertEqual(found,
+                             Search(yawnoc.Yawnoc(target)).solve(), cells)
+            if found:
+                board = conway.Conway(reverser.bestguess())
+                board.step()
+                self.assertEqual(board.cells, target.cells)
+        self.assertEqual(answers, set([False, True]))
+
+
+if __name__ == '__main__':
+    unittest.main()
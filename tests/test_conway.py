@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+
+import random
+import unittest
+
+from conx.automata import conway
+from conx.automata import rules
+
+
+@unittest.skipIf(conway.numpy is None, 'needs numpy')
+class ArrayConwayTest(unittest.TestCase):
+
+    def test_steps_like_conway(self):
+        rnd = random.Random(0)
+        for rule in (rules.LIFE, 'B36/S23', 'B2/S'):
+            for rows, columns in ((1, 1), (1, 7), (5, 9), (16, 16)):
+                cells = [[int(rnd.random() < 0.4) for _ in range(columns)]
+                         for _ in range(rows)]
+                reference = conway.Conway([row[:] for row in cells], rule)
+                board = conway.ArrayConway(cells, rule)
+                for generations in (1, 1, 3, 10):
+                    reference.step(generations)
+                    board.step(generations)
+                    self.assertEqual(board.cells, reference.cells,
+                                     (rule, rows, columns))
+
+    def test_diff_like_conway(self):
+        rnd = random.Random(1)
+        for rows, columns in ((4, 4), (6, 3), (3, 6)):
+            first = [[rnd.randint(0, 1) for _ in range(columns)]
+                     for _ in range(rows)]
+            second = [[rnd.randint(0, 1) for _ in range(4)] for _ in range(4)]
+            self.assertEqual(conway.ArrayConway(first).diff(conway.Conway(second)),
+                             conway.Conway(first).diff(conway.Conway(second)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from conx.automata import formats
+from conx.automata import rules
+
+
+class FormatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def text(self, name, text=None):
+        # Write the file if given text, and return what's in it.
+        if text is not None:
+            with open(self.path(name), 'w') as outf:
+                outf.write(text)
+        with open(self.path(name)) as inf:
+            return inf.read()
+
+    def round_trip(self, name, cells, rule=None):
+        formats.write(self.path(name), cells, rule)
+        return formats.read(self.path(name))
+
+    def test_rle_run_lengths(self):
+        cells = [[1, 1, 1, 0, 0, 1, 0, 0, 0, 0],
+                 [0] * 10,
+                 [0] * 10,
+                 [0, 0, 0, 0, 0, 0, 0, 1, 1, 1],
+                 [0] * 10]
+        self.assertEqual(self.round_trip('runs.rle', cells), (cells, None))
+        body = self.text('runs.rle').splitlines()[1]
+        self.assertEqual(body, '3o2bo3$7b3o!')
+        self.text('counted.rle', 'x = 4, y = 4\n2bo$4o2$o!\n')
+        self.assertEqual(formats.read(self.path('counted.rle')),
+                         ([[0, 0, 1, 0], [1, 1, 1, 1], [0] * 4, [1, 0, 0, 0]],
+                          None))
+
+    def test_rle_long_runs_wrap(self):
+        cells = [[1, 0] * 40 for _ in range(3)]
+        self.assertEqual(self.round_trip('wide.rle', cells), (cells, None))
+        for line in self.text('wide.rle').splitlines():
+            self.assertLessEqual(len(line), 70)
+
+    def test_rle_rule_in_header(self):
+        cells = [[0, 1, 0], [0, 1, 0], [0, 1, 0]]
+        read, rule = self.round_trip('highlife.rle', cells, 'B36/S23')
+        self.assertEqual(read, cells)
+        self.assertEqual(rule, rules.compile('B36/S23'))
+        self.assertIn('rule = B36/S23', self.text('highlife.rle'))
+        self.assertEqual(self.round_trip('life.rle', cells), (cells, None))
+
+    def test_short_trailing_row(self):
+        # Dead cells at the end of the last row aren't written at all.
+        cells = [[1, 1, 0, 1], [0, 1, 0, 0]]
+        self.assertEqual(self.round_trip('short.rle', cells), (cells, None))
+        self.assertEqual(self.round_trip('short.gol', cells), (cells, None))
+        # A .gol row cut short, even in the middle of a cell, is padded.
+        self.text('cut.gol', '[]  []\n[]  [\n[]\n')
+        self.assertEqual(formats.read(self.path('cut.gol')),
+                         ([[1, 0, 1], [1, 0, 1], [1, 0, 0]], None))
+
+    def test_packed_odd_width(self):
+        cells = [[int((row * 3 + column) % 5 == 0) for column in range(13)]
+                 for row in range(3)]
+        self.assertEqual(self.round_trip('odd.golb', cells), (cells, None))
+        self.assertEqual(os.path.getsize(self.path('odd.golb')),
+                         formats.HEADER.size + 3 * 2)
+        read, _ = formats.read(self.path('odd.golb'), array=True)
+        self.assertEqual([list(row) for row in read], cells)
+
+    def test_packed_odd_width_without_numpy(self):
+        cells = [[int((row + column) % 3 == 0) for column in range(11)]
+                 for row in range(4)]
+        numpy, formats.numpy = formats.numpy, None
+        try:
+            self.assertEqual(self.round_trip('plain.golb', cells),
+                             (cells, None))
+        finally:
+            formats.numpy = numpy
+        # Both ways write the same bytes.
+        formats.write(self.path('numpy.golb'), cells)
+        self.assertEqual(self.text('plain.golb'), self.text('numpy.golb'))
+
+
+if __name__ == '__main__':
+    unittest.main()
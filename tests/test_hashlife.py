@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+import random
+import unittest
+
+from conx.automata import conway
+from conx.automata import hashlife
+
+
+def soup(rnd, rows, columns, size, density=0.375):
+    # A random square of cells in the middle of an empty board.
+    top, left = (rows - size) // 2, (columns - size) // 2
+    cells = [[conway.DEAD] * columns for _ in range(rows)]
+    for row in range(top, top + size):
+        for column in range(left, left + size):
+            cells[row][column] = int(rnd.random() < density)
+    return conway.Conway(cells)
+
+
+def live(automata):
+    return [(row, column)
+            for row, cells in enumerate(automata.cells)
+            for column, cell in enumerate(cells)
+            if cell]
+
+
+class HashlifeTest(unittest.TestCase):
+
+    def test_against_sparse(self):
+        # Steps of every size, so Hashlife jumps by many powers of two.
+        for seed in range(4):
+            board = soup(random.Random(seed), 16, 16, 16)
+            fast = hashlife.Hashlife.from_conway(board)
+            slow = hashlife.SparseLife.from_conway(board)
+            for generations in (1, 2, 5, 8, 27, 64, 193):
+                fast.step(generations)
+                slow.step(generations)
+                self.assertEqual(fast.generation, slow.generation)
+                self.assertEqual(fast.live_cells(), slow.live_cells(),
+                                 (seed, fast.generation))
+                self.assertEqual(fast.population, slow.population)
+
+    def test_against_conway(self):
+        # Conway's board is bounded, so Hashlife is only held to it while
+        # nothing has reached the edge. The bounded SparseLife always is.
+        checkpoints = set([1, 2, 3, 4, 8, 16, 32, 64, 100, 128, 200, 256, 300])
+        for seed in range(3):
+            board = soup(random.Random(seed), 64, 64, 10)
+            fast = hashlife.Hashlife.from_conway(board)
+            bounded = hashlife.SparseLife.from_conway(board, bounded=True)
+            unbounded = hashlife.SparseLife.from_conway(board)
+            inside = True
+            for generation in range(1, 301):
+                board.step()
+                bounded.step()
+                unbounded.step()
+                self.assertEqual(bounded.live_cells(), live(board),
+                                 (seed, generation))
+                inside = inside and all(
+                    0 < row < board.rows - 1 and 0 < column < board.columns - 1
+                    for row, column in unbounded.live_cells())
+                if inside and generation in checkpoints:
+                    fast.step(generation - fast.generation)
+                    self.assertEqual(fast.live_cells(), live(board),
+                                     (seed, generation))
+            self.assertGreater(fast.generation, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
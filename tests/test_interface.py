@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+
+from conx.automata import conway
+from conx.interface import interface
+from conx.reverser import oracle
+from conx.reverser import patterns
+from conx.reverser import strip
+from conx.reverser import yawnoc
+
+
+def target(rows, columns, seed):
+    rnd = random.Random(seed)
+    board = conway.Conway([[int(rnd.random() < 0.4) for _ in range(columns)]
+                           for _ in range(rows)])
+    board.step()
+    return board
+
+
+class BackgroundTest(unittest.TestCase):
+
+    def start(self, board, reverser_class=yawnoc.Yawnoc):
+        self.board = board
+        self.interface = interface.Interface(board, reverser_class)
+        self.interface.screen.out = open(os.devnull, 'w')
+        self.interface.guess()
+        self.interface._start_autoguess()
+
+    def tearDown(self):
+        self.interface._stop_autoguess(5.0)
+        self.interface.screen.out.close()
+
+    def finish(self, limit=120.0):
+        started = time.time()
+        while self.interface.busy():
+            self.assertTrue(time.time() - started < limit)
+            self.interface._drain()
+            time.sleep(0.01)
+
+    def check(self):
+        self.assertEqual(self.interface.status_line, '')
+        board = conway.Conway(self.interface.reverser.bestguess())
+        board.step()
+        self.assertEqual(board.cells, self.board.cells)
+
+    def test_held_search_leaves_board_alone(self):
+        self.start(target(16, 16, 5))
+        time.sleep(0.2)
+        reverser = self.interface.reverser
+        with self.interface._held() as held:
+            self.assertTrue(held)
+            alibis = [row[:] for row in reverser.alibis]
+            guesses = self.interface.guesses.decisions()
+            time.sleep(0.2)
+            self.assertEqual(reverser.alibis, alibis)
+            self.assertEqual(self.interface.guesses.decisions(), guesses)
+        self.assertFalse(self.interface.paused())
+
+    def test_pause_and_carry_on(self):
+        self.start(target(16, 16, 6))
+        for _ in range(5):
+            time.sleep(0.2)
+            if not self.interface.busy():
+                break
+            self.interface._pause_autoguess()
+            self.interface._drain()
+            self.interface._resume_autoguess()
+        self.finish()
+        self.check()
+
+    def test_stop_inside_strip(self):
+        # The sweep changes nothing on the board until it's done, so this
+        # only stops in time if the sweep itself checks.
+        self.start(target(40, 10, 1), strip.Strip)
+        time.sleep(0.5)
+        started = time.time()
+        self.assertTrue(self.interface._stop_autoguess(5.0))
+        self.assertTrue(time.time() - started < 5.0)
+        self.assertFalse(self.interface.busy())
+
+    def test_stop_inside_oracle(self):
+        # Long enough to be inside the SAT solver.
+        self.start(target(32, 32, 1), oracle.Oracle)
+        time.sleep(2.0)
+        self.assertTrue(self.interface._stop_autoguess(5.0))
+        self.assertFalse(self.interface.busy())
+
+    def test_cache_from_worker(self):
+        directory = tempfile.mkdtemp()
+        try:
+            self.board = target(10, 10, 1)
+            cache = patterns.PatternCache(os.path.join(directory, 'p.db'))
+            self.interface = interface.Interface(self.board, yawnoc.Yawnoc,
+                                                 cache=cache)
+            self.interface.screen.out = open(os.devnull, 'w')
+            self.interface._start_autoguess()
+            self.finish()
+            self.check()
+            cache.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from conx.reverser import patterns
+
+
+class PatternCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'patterns.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_recall_does_not_write(self):
+        key = ('digest', (0, 0, 0, 1, 1))
+        cache = patterns.PatternCache(self.path)
+        cache.remember(key, {(0, 0): 1})
+        changes = cache._db.total_changes
+        for _ in range(10):
+            self.assertEqual(cache.recall(key), {(0, 0): 1})
+        self.assertEqual(cache._db.total_changes, changes)
+        self.assertEqual(cache.hits, 10)
+        cache.close()
+
+    def test_least_recently_recalled_goes_first(self):
+        # Recalls count towards recency, though they're only saved later.
+        cache = patterns.PatternCache(self.path, limit=2)
+        first, second, third = [('digest%i' % i, (0, 0, 0, 1, 1))
+                                for i in range(3)]
+        cache.remember(first, None)
+        cache.remember(second, None)
+        self.assertEqual(cache.recall(first), None)
+        cache.remember(third, None)
+        cache.close()
+        cache = patterns.PatternCache(self.path, limit=2)
+        self.assertEqual(cache.recall(first), None)
+        self.assertRaises(KeyError, cache.recall, second)
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
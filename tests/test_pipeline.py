@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+
+import random
+import unittest
+
+from conx.automata import conway
+from conx.reverser.pipeline import Pipeline
+
+
+class PipelineTest(unittest.TestCase):
+
+    def test_chain_keeps_rule(self):
+        # Every stage is reversed under the target's rule, not Life's.
+        rule = 'B36/S23'
+        rnd = random.Random(2)
+        cells = [[int(rnd.random() < 0.4) for _ in range(6)] for _ in range(6)]
+        target = conway.Conway(cells, rule=rule)
+        target.step(2)
+        chain = Pipeline(target, 2).run()
+        self.assertEqual(len(chain), 3)
+        for before, after in zip(chain, chain[1:]):
+            self.assertEqual(str(before.rule), str(after.rule))
+            board = conway.Conway([row[:] for row in before.cells], rule=rule)
+            board.step()
+            self.assertEqual(board.cells, after.cells)
+
+
+if __name__ == '__main__':
+    unittest.main()
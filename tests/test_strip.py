@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+import collections
+import random
+import unittest
+
+from conx.automata import conway
+from conx.reverser import strip
+from conx.reverser import yawnoc
+from conx.reverser.search import Search
+
+
+def predecessor_counts(rows, columns):
+    # How many predecessors each board of this size has, found by stepping
+    # every board. Boards left out have none.
+    counts = collections.Counter()
+    for bits in range(1 << (rows * columns)):
+        board = conway.Conway([[bits >> (row * columns + column) & 1
+                                for column in range(columns)]
+                               for row in range(rows)])
+        board.step()
+        counts[tuple(map(tuple, board.cells))] += 1
+    return counts
+
+
+class StripTest(unittest.TestCase):
+
+    def test_count_matches_search_and_brute_force(self):
+        rnd = random.Random(0)
+        for rows, columns in ((1, 4), (2, 3), (3, 3), (4, 2), (3, 4), (4, 4)):
+            counts = predecessor_counts(rows, columns)
+            targets = rnd.sample(sorted(counts), min(12, len(counts)))
+            # And a few that may well have none.
+            targets += [tuple(tuple(rnd.randint(0, 1) for _ in range(columns))
+                              for _ in range(rows)) for _ in range(4)]
+            for cells in targets:
+                target = conway.Conway([list(row) for row in cells])
+                expected = counts[cells]
+                self.assertEqual(strip.Strip(target).count(), expected, cells)
+                self.assertEqual(Search(yawnoc.Yawnoc(target)).count(),
+                                 expected, cells)
+
+
+if __name__ == '__main__':
+    unittest.main()
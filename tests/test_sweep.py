@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+import random
+import unittest
+
+from conx.automata import conway
+from conx.reverser import sweep
+from conx.reverser import yawnoc
+from conx.reverser.search import Search
+
+
+def mirrored(rnd, rows, half):
+    # A board that reads the same left to right as right to left.
+    cells = []
+    for _ in range(rows):
+        row = [int(rnd.random() < 0.4) for _ in range(half)]
+        cells.append(row + row[::-1])
+    return cells
+
+
+@unittest.skipIf(sweep.numpy is None, 'needs numpy')
+class SweeperTest(unittest.TestCase):
+
+    def test_tied_corroborate_holds_images(self):
+        # Tied to the target's symmetries, a sweep narrows each cell as far
+        # as Yawnoc does, images and all. One corner is fixed first, as in
+        # the predecessor, so the board isn't symmetric to start with.
+        rnd = random.Random(0)
+        for _ in range(5):
+            cells = mirrored(rnd, 6, 3)
+            target = conway.Conway(cells)
+            target.step()
+            reversers = [yawnoc.Yawnoc(target), sweep.Sweeper(target)]
+            self.assertTrue(reversers[0].symmetries)
+            alibis = []
+            for reverser in reversers:
+                reverser.tie(reverser.symmetries)
+                reverser.narrow(0, 0, c=cells[0][0])
+                try:
+                    for _ in reverser.corroborate():
+                        pass
+                except ZeroDivisionError:
+                    alibis.append(None)
+                else:
+                    alibis.append(reverser.alibis)
+            self.assertEqual(alibis[1], alibis[0])
+
+    def test_solves_symmetric_targets(self):
+        rnd = random.Random(1)
+        for _ in range(5):
+            target = conway.Conway(mirrored(rnd, 6, 3))
+            target.step()
+            reverser = sweep.Sweeper(target)
+            self.assertTrue(Search(reverser).solve())
+            board = conway.Conway(reverser.bestguess())
+            board.step()
+            self.assertEqual(board.cells, target.cells)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+import random
+import unittest
+
+from conx.automata import conway
+from conx.reverser import tiles
+
+
+class TilerTest(unittest.TestCase):
+
+    def test_stitch_repairs_a_tile(self):
+        # One tile's solution doesn't fit the tiles fixed before it, so it's
+        # solved again against them, and the board stitches without a search
+        # of the whole.
+        rnd = random.Random(0)
+        cells = [[int(rnd.random() < 0.15) for _ in range(12)] for _ in range(12)]
+        target = conway.Conway(cells)
+        target.step()
+        tiler = tiles.Tiler(target, tile=4, processes=1)
+        predecessor = tiler.solve()
+        self.assertFalse(tiler.fell_back)
+        self.assertEqual(tiler.repairs, 1)
+        board = conway.Conway(predecessor)
+        board.step()
+        self.assertEqual(board.cells, target.cells)
+
+    def test_failed_stitch_falls_back_once(self):
+        # These tiles can't be stitched together, even with repairs; after
+        # one try the board is searched whole, rather than again with wider
+        # and wider halos.
+        rnd = random.Random(2)
+        cells = [[int(rnd.random() < 0.4) for _ in range(12)] for _ in range(12)]
+        target = conway.Conway(cells)
+        target.step()
+        tiler = tiles.Tiler(target, tile=4, halo=1, processes=1)
+        predecessor = tiler.solve()
+        self.assertTrue(tiler.fell_back)
+        self.assertEqual(tiler.stitches, 1)
+        self.assertEqual(tiler.halo, 1)
+        board = conway.Conway(predecessor)
+        board.step()
+        self.assertEqual(board.cells, target.cells)
+
+
+if __name__ == '__main__':
+    unittest.main()
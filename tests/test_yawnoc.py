@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import unittest
+
+from conx.automata import conway
+from conx.reverser import symmetry
+from conx.reverser import yawnoc
+from conx.reverser.search import Search
+
+
+def boards(rows, columns):
+    for bits in range(1 << (rows * columns)):
+        yield [[bits >> (row * columns + column) & 1
+                for column in range(columns)] for row in range(rows)]
+
+
+def successors(rows, columns):
+    # Every board of this size that has a predecessor.
+    found = set()
+    for cells in boards(rows, columns):
+        board = conway.Conway(cells)
+        board.step()
+        found.add(tuple(map(tuple, board.cells)))
+    return found
+
+
+class Asymmetric(yawnoc.Yawnoc):
+    # Once untied, turns down any whole predecessor with the target's
+    # symmetries, so the search has to carry on past one.
+
+    def evaluate_guesses(self, guesses):
+        for X in super(Asymmetric, self).evaluate_guesses(guesses):
+            yield X
+        if not self._ties and self.next_guessable() is None:
+            if set(self.symmetries) & set(symmetry.of(self.bestguess())):
+                self.impossible = True
+                self.conflict = self.decisions[:]
+                raise ZeroDivisionError()
+
+
+class SearchTest(unittest.TestCase):
+
+    def check(self, cells, **kwargs):
+        target = conway.Conway(cells)
+        reverser = yawnoc.Yawnoc(target, **kwargs)
+        if not Search(reverser).solve():
+            return False
+        board = conway.Conway(reverser.bestguess())
+        board.step()
+        self.assertEqual(board.cells, target.cells)
+        return True
+
+    def test_no_predecessor_smallest_first(self):
+        # An alibi emptied by a revision must be noticed even if the cell
+        # never comes off the queue again.
+        cells = [[0, 0, 1, 1],
+                 [1, 0, 0, 0],
+                 [0, 0, 0, 0]]
+        self.assertFalse(self.check(cells, smallest_first=True))
+
+    def test_against_brute_force(self):
+        reachable = successors(3, 3)
+        for cells in boards(3, 3):
+            expected = tuple(map(tuple, cells)) in reachable
+            for smallest_first in (False, True):
+                self.assertEqual(self.check(cells, smallest_first=smallest_first),
+                                 expected, (cells, smallest_first))
+
+    def test_untied_guesses_can_flip(self):
+        # The symmetric predecessor found first doesn't extend, but flipping
+        # a guess the ties forced gives one that does.
+        target = conway.Conway([[0, 0, 0],
+                                [1, 0, 1],
+                                [1, 0, 1]])
+        reverser = Asymmetric(target)
+        search = Search(reverser, order='alive')
+        self.assertTrue(search._solve_tied(reverser.symmetries))
+        cells = reverser.bestguess()
+        self.assertFalse(set(reverser.symmetries) & set(symmetry.of(cells)))
+        board = conway.Conway(cells)
+        board.step()
+        self.assertEqual(board.cells, target.cells)
+
+
+if __name__ == '__main__':
+    unittest.main()